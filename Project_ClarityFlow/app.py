@@ -11,7 +11,10 @@ from features.schedule_realism import ScheduleRealismScorer
 from features.cognitive_load import CognitiveLoadDetector
 from features.execution_drift import ExecutionDriftAnalyzer
 from features.task_prioritization import TaskPrioritizer
+from features.learned_ranker import LearnedPriorityRanker
 from core.models import Task
+from core.capacity import CapacityModel
+from core.dependencies import TaskDependencyGraph, DependencyCycleError
 import os
 import sys
 import json
@@ -410,6 +413,10 @@ if "models" not in st.session_state:
     st.session_state.models = {}
 if "active_page" not in st.session_state:
     st.session_state.active_page = "Dashboard"
+if "capacity" not in st.session_state:
+    st.session_state.capacity = CapacityModel()
+if "dependencies" not in st.session_state:
+    st.session_state.dependencies = TaskDependencyGraph()
 
 
 
@@ -441,45 +448,36 @@ def generate_sample_tasks(num_tasks=10):
         tasks.append(task)
     return tasks
 
-def render_productivity_heatmap():
+def render_productivity_heatmap(cube=None):
     """Productivity rhythm heatmap visualization"""
     st.subheader("🔥 Your Productivity Rhythm Heatmap")
     st.caption("Discover your peak performance times")
     
-    # Get completed tasks with data
-    completed = [t for t in st.session_state.tasks 
-                 if t.completed and hasattr(t, 'focus_level') and t.focus_level]
+    if cube is None:
+        cube = PersonalProductivityRhythmTracker.build_rhythm_cube(
+            st.session_state.tasks)
+    tasks_analyzed = int(cube["count"].sum()) if not cube.empty else 0
     
-    if len(completed) < 10:
-        st.info(f"📊 Complete {10 - len(completed)} more tasks to unlock your rhythm heatmap!")
+    if tasks_analyzed < 10:
+        st.info(f"📊 Complete {10 - tasks_analyzed} more tasks to unlock your rhythm heatmap!")
         return
     
     # Process data
     hours = list(range(8, 19))  # 8am to 6pm
     days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
     
-    # Calculate average focus by day and hour
-    focus_data = {}
-    for task in completed:
-        day = task.time_of_day.strftime('%a')[:3]  # Mon, Tue, etc.
-        hour = task.time_of_day.hour
-        
-        if day in days and 8 <= hour < 19:
-            key = (days.index(day), hour - 8)
-            if key not in focus_data:
-                focus_data[key] = []
-            focus_data[key].append(task.focus_level)
+    # Focus by day and hour, shrunk toward the hour/global mean so sparse
+    # or empty slots show a sensible estimate instead of 0
+    by_slot = PersonalProductivityRhythmTracker.shrink_rhythm_cube(
+        cube, ["weekday", "hour"],
+        levels={"weekday": list(range(len(days))), "hour": hours})
+    focus_grid = by_slot.set_index(["weekday", "hour"])["focus_level_post"]
     
     # Create heatmap data: [day_index, hour_index, avg_focus]
-    heatmap_data = []
-    for d in range(len(days)):
-        for h in range(len(hours)):
-            key = (d, h)
-            if key in focus_data:
-                avg_focus = sum(focus_data[key]) / len(focus_data[key])
-                heatmap_data.append([d, h, round(avg_focus, 1)])
-            else:
-                heatmap_data.append([d, h, 0])  # No data
+    heatmap_data = [
+        [d, h - hours[0], round(float(v), 1)]
+        for (d, h), v in focus_grid.items()
+    ]
     
     # ECharts configuration
     option = {
@@ -572,45 +570,44 @@ def render_productivity_heatmap():
             with col1:
                 st.metric("🏆 Peak Time", f"{best_day} {best_hour}:00")
             with col2:
-                avg_focus = sum(d[2] for d in heatmap_data if d[2] > 0) / len([d for d in heatmap_data if d[2] > 0])
-                st.metric("📊 Avg Focus", f"{avg_focus:.1f}/5")
+                # Raw means of the slots with history; the shrunk estimates
+                # for empty slots would pull the average toward the prior
+                observed = by_slot[by_slot["count"] > 0]["focus_level"]
+                st.metric("📊 Avg Focus",
+                          f"{observed.mean():.1f}/5" if len(observed) else "—")
             with col3:
-                tasks_analyzed = len(completed)
                 st.metric("📈 Tasks Analyzed", tasks_analyzed)
 
-def render_3d_focus_surface():
+def render_3d_focus_surface(cube=None):
     """3D surface showing focus by hour and complexity"""
     st.subheader("🎢 3D Focus Landscape")
     st.caption("Your focus level across time and task complexity")
     
-    completed = [t for t in st.session_state.tasks 
-                 if t.completed and hasattr(t, 'focus_level') and t.focus_level]
+    if cube is None:
+        cube = PersonalProductivityRhythmTracker.build_rhythm_cube(
+            st.session_state.tasks)
+    tasks_analyzed = int(cube["count"].sum()) if not cube.empty else 0
     
-    if len(completed) < 20:
-        st.info(f"📊 Complete {20 - len(completed)} more tasks to unlock 3D visualization!")
+    if tasks_analyzed < 20:
+        st.info(f"📊 Complete {20 - tasks_analyzed} more tasks to unlock 3D visualization!")
         return
     
     # Create 3D grid data
     hours = list(range(8, 19))  # 8am to 6pm
     complexity_levels = [1, 2, 3, 4, 5]
     
-    # Calculate average focus for each hour x complexity combo
-    grid_data = []
-    for complexity in complexity_levels:
-        row = []
-        for hour in hours:
-            matching_tasks = [
-                t for t in completed 
-                if t.time_of_day.hour == hour 
-                and abs(t.complexity_score - complexity) < 0.8
-            ]
-            
-            if matching_tasks:
-                avg_focus = np.mean([t.focus_level for t in matching_tasks])
-                row.append(round(avg_focus, 2))
-            else:
-                row.append(1.5)
-        grid_data.append(row)
+    # Shrunk focus for each hour x complexity combo (empty cells fall back
+    # to the hour's estimate)
+    by_level = PersonalProductivityRhythmTracker.shrink_rhythm_cube(
+        cube, ["complexity_bucket", "hour"],
+        levels={"complexity_bucket": complexity_levels, "hour": hours})
+    grid_data = (
+        by_level.pivot(index="complexity_bucket", columns="hour",
+                       values="focus_level_post")
+        .reindex(index=complexity_levels, columns=hours)
+        .round(2)
+        .values.tolist()
+    )
     
     # Format data for 3D surface
     surface_data = []
@@ -718,7 +715,11 @@ def render_priority_matrix():
     
     # Prioritize tasks using AI
     try:
-        prioritized = TaskPrioritizer.prioritize_tasks(incomplete, current_energy=3)
+        ranker = st.session_state.models.get("priority_ranker")
+        prioritized = TaskPrioritizer.prioritize_tasks(
+            incomplete, current_energy=3,
+            weights=ranker.weights if ranker is not None else None,
+            dependencies=st.session_state.dependencies)
     except Exception as e:
         st.error(f"Error prioritizing tasks: {e}")
         return
@@ -895,6 +896,109 @@ def render_priority_matrix():
         </div>
         """, unsafe_allow_html=True)
 
+def _collect_ai_results():
+    """Patch finished background AI results into session state.
+
+    Returns True if anything changed.
+    """
+    changed = False
+
+    future = st.session_state.get("ai_priority_future")
+    if future is not None and future.done():
+        st.session_state.ai_priority_future = None
+        try:
+            st.session_state.prioritized_tasks = future.result()
+        except Exception as e:
+            print(f"[Dashboard] AI prioritization failed: {e}")
+        # Explain the final (AI-enhanced) order
+        explanation, explanation_future = (
+            TaskPrioritizer.get_ai_prioritization_explanation_async(
+                st.session_state.prioritized_tasks))
+        st.session_state.priority_explanation = explanation
+        st.session_state.ai_explanation_future = explanation_future
+        changed = True
+
+    future = st.session_state.get("ai_explanation_future")
+    if future is not None and future.done():
+        st.session_state.ai_explanation_future = None
+        try:
+            st.session_state.priority_explanation = future.result()
+        except Exception as e:
+            print(f"[Dashboard] AI explanation failed: {e}")
+        changed = True
+
+    return changed
+
+
+def _poll_ai_results():
+    """Rerun the page as soon as a background AI result lands"""
+    if _collect_ai_results():
+        st.rerun()
+
+
+if hasattr(st, "fragment"):
+    _poll_ai_results = st.fragment(run_every=1)(_poll_ai_results)
+
+
+def render_priority_detail():
+    """Prioritized task list: heuristic ranking first, AI scores patched in"""
+    _collect_ai_results()
+    prioritized = st.session_state.get("prioritized_tasks") or []
+
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.subheader("🎯 Prioritized Tasks")
+    with col2:
+        if st.button("Close", key="close_priority_detail", use_container_width=True):
+            st.session_state.show_priority_detail = False
+            st.rerun()
+
+    pending = (
+        st.session_state.get("ai_priority_future") is not None
+        or st.session_state.get("ai_explanation_future") is not None
+    )
+    if pending:
+        st.caption("⏳ AI strategic scoring in progress - showing heuristic ranking")
+        if hasattr(st, "fragment"):
+            _poll_ai_results()
+        elif st.button("Refresh", key="refresh_priority_detail"):
+            st.rerun()
+
+    st.info(st.session_state.get("priority_explanation", ""))
+
+    graph = st.session_state.dependencies
+    if graph.edge_count and prioritized:
+        tasks = [t['task'] for t in prioritized]
+        drift_analyzer = st.session_state.models.get(
+            "drift_analyzer", ExecutionDriftAnalyzer())
+        try:
+            path = graph.critical_path(
+                tasks, drift_analyzer.predict_many(tasks)["ai_prediction"])
+            st.caption(
+                f"🧩 Critical path: {path['length'] / 60:.1f}h across "
+                f"{len(path['path'])} dependent tasks")
+        except DependencyCycleError as e:
+            st.warning(f"⚠️ {e}")
+
+    for i, task_data in enumerate(prioritized[:10], 1):
+        task = task_data['task']
+        reasoning = task_data.get('ai_reasoning')
+        reasoning_html = f"<br/><small>🤖 {reasoning}</small>" if reasoning else ""
+        if task_data.get('blocked_by_count'):
+            reasoning_html += f"<br/><small>⛔ Waiting on {task_data['blocked_by_count']} task(s)</small>"
+        elif task_data.get('unblocks_count'):
+            reasoning_html += f"<br/><small>🔓 Unblocks {task_data['unblocks_count']} task(s)</small>"
+        st.markdown(f"""
+        <div style="background: white; padding: 1rem; border-radius: 12px; 
+                    border-left: 4px solid #667eea; margin: 0.5rem 0;">
+            <strong>#{i}: {task.task_type.title()}</strong> ({task.estimated_minutes} min)
+            <br/>
+            <small>Priority: {task_data['priority_score']:.0f} | Urgency: {task_data['urgency_score']:.0f}
+            | Strategic: {task_data['strategic_value_score']:.0f}</small>{reasoning_html}
+        </div>
+        """, unsafe_allow_html=True)
+
+
 def render_header():
     """Compact logo banner"""
     if LOGO_DATA:
@@ -1003,7 +1107,8 @@ def render_dashboard():
 
     with col2:
         if today_tasks:
-            load = CognitiveLoadDetector.calculate_load(today_tasks)
+            load = CognitiveLoadDetector.calculate_load(
+                today_tasks, st.session_state.capacity)
             load_score = load['score']
 
             if load_score > 75:
@@ -1055,9 +1160,19 @@ def render_dashboard():
 
         if st.button("Prioritize Now", key="priority_btn", use_container_width=True, type="primary"):
             if incomplete_tasks:
+                ranker = st.session_state.models.get("priority_ranker")
+                weights = ranker.weights if ranker is not None else None
                 prioritized = TaskPrioritizer.prioritize_tasks(
-                    incomplete_tasks, current_energy=3)
+                    incomplete_tasks, current_energy=3, weights=weights,
+                    dependencies=st.session_state.dependencies)
+                # Show the heuristic ranking now; AI scores arrive later
+                prioritized, future = TaskPrioritizer.ai_enhance_prioritization_async(
+                    prioritized, weights=weights)
                 st.session_state.prioritized_tasks = prioritized
+                st.session_state.ai_priority_future = future
+                st.session_state.ai_explanation_future = None
+                st.session_state.priority_explanation = (
+                    TaskPrioritizer._heuristic_explanation(prioritized))
                 st.session_state.show_priority_detail = True
                 st.rerun()
             else:
@@ -1071,7 +1186,7 @@ def render_dashboard():
             drift_analyzer = st.session_state.models.get(
                 "drift_analyzer", ExecutionDriftAnalyzer())
             realism = ScheduleRealismScorer.calculate_score(
-                today_tasks, drift_analyzer)
+                today_tasks, drift_analyzer, st.session_state.capacity)
             realism_score = realism['score']
 
             if realism_score >= 75:
@@ -1107,7 +1222,8 @@ def render_dashboard():
 
         if len(completed_with_data) >= 5:
             tracker = PersonalProductivityRhythmTracker()
-            summary = tracker.summarize_rhythm(completed_with_data)
+            summary = tracker.summarize_rhythm(
+                completed_with_data, shrink=True)
             peak_hour = summary['best_focus_hour']
             rhythm_status = f"Peak: {peak_hour}:00"
             rhythm_color = "#667eea"
@@ -1144,6 +1260,10 @@ def render_dashboard():
             st.session_state.active_page = "Add Task"
             st.rerun()
 
+    if st.session_state.get("show_priority_detail"):
+        st.markdown("---")
+        render_priority_detail()
+
 
 def render_add_task():
     st.title("➕ Add Task")
@@ -1158,10 +1278,14 @@ def render_add_task():
             complexity = st.slider("Complexity", 1.0, 5.0, 3.0, 0.5)
             date = st.date_input("Date", datetime.now())
         time = st.time_input("Time", datetime.now().time())
+        open_tasks = [t.task_id for t in st.session_state.tasks if not t.completed]
+        blocked_by = st.multiselect("Blocked by", open_tasks)
         if st.form_submit_button("✅ Add Task", type="primary"):
             task = Task(f"task_{len(st.session_state.tasks)+1}", task_type,
                         estimated, complexity, datetime.combine(date, time))
             st.session_state.tasks.append(task)
+            for blocker in blocked_by:
+                st.session_state.dependencies.add_dependency(task.task_id, blocker)
             st.success("✅ Task added!")
             st.balloons()
 
@@ -1183,8 +1307,10 @@ def render_analytics():
         return
 
     # EXISTING ANALYTICS
+    # One rhythm cube shared by the summary, heatmap and 3D surface
     tracker = PersonalProductivityRhythmTracker()
-    summary = tracker.summarize_rhythm(completed)
+    cube = tracker.build_rhythm_cube(completed)
+    summary = tracker.summarize_rhythm(completed, cube=cube, shrink=True)
 
     col1, col2 = st.columns(2)
     with col1:
@@ -1203,13 +1329,13 @@ def render_analytics():
     st.markdown("---")
     
     # ADD THE HEATMAP HERE ← NEW!
-    render_productivity_heatmap()
+    render_productivity_heatmap(cube)
 
     st.markdown("---")
 
 
      # 3D SURFACE - ADD THIS
-    render_3d_focus_surface()
+    render_3d_focus_surface(cube)
     
     st.markdown("---")
     
@@ -1223,7 +1349,30 @@ def render_analytics():
 
 def render_settings():
     st.title("⚙️ Settings")
-    st.info("Settings here")
+    st.markdown("---")
+
+    st.subheader("🎯 Learned Priorities")
+    st.caption("Fit prioritization weights to the order you actually complete tasks in")
+    if st.button("Learn from my history", type="primary"):
+        ranker = LearnedPriorityRanker()
+        result = ranker.train(st.session_state.tasks)
+        if result["status"] == "success":
+            st.session_state.models["priority_ranker"] = ranker
+            st.success(f"✅ Trained on {result['pairs']} task pairs")
+            if result["accuracy"] is not None:
+                st.metric("Ordering accuracy", f"{result['accuracy']:.0%}",
+                          f"{result['accuracy'] - result['default_accuracy']:+.0%} vs default")
+        else:
+            st.warning(f"Complete {result['tasks_needed']} more tasks to learn your priorities")
+
+    ranker = st.session_state.models.get("priority_ranker")
+    if ranker is not None:
+        st.dataframe(pd.DataFrame(
+            {"factor": list(ranker.weights), "weight": list(ranker.weights.values())}),
+            use_container_width=True, hide_index=True)
+        if st.button("Reset to default weights"):
+            del st.session_state.models["priority_ranker"]
+            st.rerun()
 
 
 def main():
@@ -0,0 +1,23 @@
+# core/background.py
+
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import threading
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_LOCK = threading.Lock()
+
+
+def submit(fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """
+    Run fn(*args, **kwargs) on the shared background pool (created on
+    first use) and return its Future. Used for slow LLM calls so the
+    Streamlit script thread never waits on the network.
+    """
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="clarityflow-ai")
+    return _EXECUTOR.submit(fn, *args, **kwargs)
@@ -0,0 +1,210 @@
+# core/capacity.py
+
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from datetime import datetime, date, time, timedelta
+from typing import List, Tuple, Optional, Iterable
+from core.models import Task
+
+
+class CapacityModel:
+    """
+    Calendar-aware capacity: working hours minus blocked time.
+
+    Blocked time (meetings, breaks, focus blocks already booked) is kept as
+    a sorted list of merged, non-overlapping intervals with a prefix sum of
+    their durations. Busy-time, free-time and fit queries are a couple of
+    binary searches, i.e. O(log n) in the number of blocks.
+
+    Inserting a block is O(n): the interval lists are shifted and the prefix
+    sums after it are stale. They are recomputed lazily on the next
+    busy-time query, so a batch of block() calls pays for one rebuild.
+
+    With no blocks and the default 9:00-17:00 window a day has 8 hours,
+    matching the fixed capacity the scorers used before.
+    """
+
+    def __init__(
+        self,
+        work_start: time = time(9, 0),
+        work_end: time = time(17, 0),
+        working_days: Iterable[int] = range(7),
+        blocked: Iterable[Tuple[datetime, datetime]] = (),
+    ) -> None:
+        """
+        Args:
+            work_start: Start of the working day
+            work_end: End of the working day
+            working_days: Weekdays that have working hours (0=Mon ... 6=Sun)
+            blocked: Initial (start, end) intervals of blocked time
+        """
+        self.work_start = work_start
+        self.work_end = work_end
+        self.working_days = set(working_days)
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        # _prefix[i] = blocked minutes in intervals before i, valid up to
+        # index _valid (entries after it are rebuilt on demand)
+        self._prefix: List[float] = [0.0]
+        self._valid = 0
+        for start, end in blocked:
+            self.block(start, end)
+
+    # ============ BUILDING ============
+
+    def block(self, start: datetime, end: datetime) -> None:
+        """Mark [start, end) as unavailable (merged with any overlap). O(n)."""
+        if end <= start:
+            return
+        # Intervals touching [start, end) are merged into one
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+        self._valid = min(self._valid, lo)
+
+    def _refresh_prefix(self) -> None:
+        """Recompute prefix sums after the first interval changed since the last query."""
+        if self._valid >= len(self._starts):
+            return
+        prefix = self._prefix[: self._valid + 1]
+        for s, e in zip(self._starts[self._valid:], self._ends[self._valid:]):
+            prefix.append(prefix[-1] + (e - s).total_seconds() / 60)
+        self._prefix = prefix
+        self._valid = len(self._starts)
+
+    def block_task(self, task: Task) -> None:
+        """Block the slot a fixed-time task (e.g. a meeting) occupies."""
+        self.block(
+            task.time_of_day,
+            task.time_of_day + timedelta(minutes=task.estimated_minutes),
+        )
+
+    def copy(self) -> "CapacityModel":
+        clone = CapacityModel(self.work_start, self.work_end, self.working_days)
+        clone._starts = list(self._starts)
+        clone._ends = list(self._ends)
+        clone._prefix = list(self._prefix)
+        clone._valid = self._valid
+        return clone
+
+    @property
+    def blocks(self) -> List[Tuple[datetime, datetime]]:
+        return list(zip(self._starts, self._ends))
+
+    # ============ QUERIES ============
+
+    def window(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """Working hours for a date, or None on a non-working day."""
+        if day.weekday() not in self.working_days:
+            return None
+        return (
+            datetime.combine(day, self.work_start),
+            datetime.combine(day, self.work_end),
+        )
+
+    def _blocked_before(self, x: datetime) -> float:
+        """Blocked minutes in all intervals before instant x."""
+        k = bisect_right(self._starts, x) - 1
+        if k < 0:
+            return 0.0
+        self._refresh_prefix()
+        inside = (min(x, self._ends[k]) - self._starts[k]).total_seconds() / 60
+        return self._prefix[k] + inside
+
+    def busy_minutes(self, start: datetime, end: datetime) -> float:
+        """Blocked minutes within [start, end)."""
+        if end <= start:
+            return 0.0
+        return self._blocked_before(end) - self._blocked_before(start)
+
+    def free_minutes(self, start: datetime, end: datetime) -> float:
+        """Unblocked working minutes within [start, end)."""
+        total = 0.0
+        day = start.date()
+        while day <= end.date():
+            win = self.window(day)
+            if win is not None:
+                a, b = max(start, win[0]), min(end, win[1])
+                if b > a:
+                    total += (b - a).total_seconds() / 60 - self.busy_minutes(a, b)
+            day += timedelta(days=1)
+        return total
+
+    def available_minutes(self, day: date) -> float:
+        """Free working minutes on a date."""
+        win = self.window(day)
+        if win is None:
+            return 0.0
+        return self.free_minutes(*win)
+
+    def fits(self, start: datetime, minutes: float) -> bool:
+        """True if [start, start + minutes) is inside working hours and free."""
+        end = start + timedelta(minutes=minutes)
+        win = self.window(start.date())
+        if win is None or start < win[0] or end > win[1]:
+            return False
+        return self.busy_minutes(start, end) == 0
+
+    def next_free_slot(
+        self,
+        after: datetime,
+        minutes: float,
+        until: Optional[datetime] = None,
+    ) -> Optional[datetime]:
+        """
+        Earliest start >= after where `minutes` of free working time fit in
+        one piece, or None if nothing fits before `until` (default: end of
+        after's working day).
+        """
+        if until is None:
+            win = self.window(after.date())
+            until = win[1] if win else after
+        need = timedelta(minutes=minutes)
+        day = after.date()
+
+        while day <= until.date():
+            win = self.window(day)
+            if win is not None:
+                cursor = max(after, win[0])
+                day_end = min(win[1], until)
+                while cursor + need <= day_end:
+                    # Step out of a block we're inside
+                    k = bisect_right(self._starts, cursor) - 1
+                    if k >= 0 and self._ends[k] > cursor:
+                        cursor = self._ends[k]
+                        continue
+                    # Gap runs until the next block (or end of day)
+                    j = k + 1
+                    gap_end = day_end
+                    if j < len(self._starts) and self._starts[j] < day_end:
+                        gap_end = self._starts[j]
+                    if cursor + need <= gap_end:
+                        return cursor
+                    if gap_end == day_end:
+                        break
+                    cursor = self._ends[j]
+            day += timedelta(days=1)
+        return None
+
+    def free_intervals(self, day: date) -> List[Tuple[datetime, datetime]]:
+        """Free (start, end) gaps within a day's working hours."""
+        win = self.window(day)
+        if win is None:
+            return []
+        start, end = win
+        gaps = []
+        cursor = start
+        k = max(bisect_right(self._starts, start) - 1, 0)
+        while k < len(self._starts) and self._starts[k] < end:
+            if self._ends[k] > cursor:
+                if self._starts[k] > cursor:
+                    gaps.append((cursor, self._starts[k]))
+                cursor = self._ends[k]
+            k += 1
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
@@ -0,0 +1,268 @@
+# core/dependencies.py
+
+from __future__ import annotations
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from core.models import Task
+
+
+class DependencyCycleError(ValueError):
+    """Raised when the dependency graph over the given tasks has a cycle."""
+
+    def __init__(self, task_ids: List[str]) -> None:
+        self.task_ids = task_ids
+        preview = ", ".join(task_ids[:5]) + (" ..." if len(task_ids) > 5 else "")
+        super().__init__(f"Dependency cycle among {len(task_ids)} tasks: {preview}")
+
+
+class TaskDependencyGraph:
+    """
+    "B can't start before A is done" edges between tasks, kept next to the
+    task list (Task itself stays a flat record).
+
+    Edges are stored by task_id, so the graph outlives task objects and
+    serializes with to_dict()/from_dict(). Every query takes the tasks it
+    should consider and works on a compressed (CSR) copy of the edges
+    between them: edges to tasks outside that list are ignored, which makes
+    "outside" blockers count as done. All queries are O(V + E).
+    """
+
+    def __init__(self, edges: Iterable[Tuple[str, str]] = ()) -> None:
+        """
+        Args:
+            edges: Initial (blocker_id, dependent_id) pairs
+        """
+        self._dependents: Dict[str, Set[str]] = {}
+        self._blockers: Dict[str, Set[str]] = {}
+        self._version = 0
+        self._arrays = None  # (version, node index, sources, targets)
+        for blocker, dependent in edges:
+            self.add_dependency(dependent, blocker)
+
+    # ============ EDITING ============
+
+    def add_dependency(self, task_id: str, depends_on: str) -> None:
+        """Record that `task_id` can't start until `depends_on` is done."""
+        if task_id == depends_on:
+            raise ValueError(f"Task {task_id} can't depend on itself")
+        self._dependents.setdefault(depends_on, set()).add(task_id)
+        self._blockers.setdefault(task_id, set()).add(depends_on)
+        self._version += 1
+
+    def remove_dependency(self, task_id: str, depends_on: str) -> None:
+        self._dependents.get(depends_on, set()).discard(task_id)
+        self._blockers.get(task_id, set()).discard(depends_on)
+        self._version += 1
+
+    def remove_task(self, task_id: str) -> None:
+        """Drop every edge into or out of a task (e.g. when it's deleted)."""
+        for dependent in self._dependents.pop(task_id, set()):
+            self._blockers[dependent].discard(task_id)
+        for blocker in self._blockers.pop(task_id, set()):
+            self._dependents[blocker].discard(task_id)
+        self._version += 1
+
+    def blockers_of(self, task_id: str) -> Set[str]:
+        return set(self._blockers.get(task_id, ()))
+
+    def dependents_of(self, task_id: str) -> Set[str]:
+        return set(self._dependents.get(task_id, ()))
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(d) for d in self._dependents.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            "edges": sorted(
+                [blocker, dependent]
+                for blocker, dependents in self._dependents.items()
+                for dependent in dependents
+            )
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TaskDependencyGraph":
+        return cls((blocker, dependent) for blocker, dependent in data.get("edges", []))
+
+    # ============ COMPILED VIEW ============
+
+    def _edge_arrays(self) -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+        """All edges as integer arrays, rebuilt only after the graph changes."""
+        if self._arrays is None or self._arrays[0] != self._version:
+            node: Dict[str, int] = {}
+            sources, targets = [], []
+            for blocker, dependents in self._dependents.items():
+                b = node.setdefault(blocker, len(node))
+                for dependent in dependents:
+                    sources.append(b)
+                    targets.append(node.setdefault(dependent, len(node)))
+            self._arrays = (
+                self._version, node,
+                np.asarray(sources, dtype=np.int64),
+                np.asarray(targets, dtype=np.int64),
+            )
+        return self._arrays[1:]
+
+    def _compile(self, tasks: Sequence[Task]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Edges among `tasks` in CSR form: the dependents of task i are
+        indices[indptr[i]:indptr[i + 1]] (positions in `tasks`).
+        """
+        node, sources, targets = self._edge_arrays()
+        n = len(tasks)
+        node_of_task = np.fromiter(
+            (node.get(t.task_id, -1) for t in tasks), dtype=np.int64, count=n)
+        known = node_of_task >= 0
+        position = np.full(len(node) + 1, -1, dtype=np.int64)  # [-1] -> -1
+        position[node_of_task[known]] = np.flatnonzero(known)
+
+        source, target = position[sources], position[targets]
+        keep = (source >= 0) & (target >= 0)
+        source, target = source[keep], target[keep]
+        order = np.argsort(source, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=n), out=indptr[1:])
+        return indptr, target[order]
+
+    @staticmethod
+    def _kahn(indptr: np.ndarray, indices: np.ndarray) -> List[int]:
+        """Kahn's algorithm; ready tasks are taken in input order."""
+        n = len(indptr) - 1
+        in_degree = np.bincount(indices, minlength=n).tolist()
+        ptr = indptr.tolist()
+        targets = indices.tolist()
+        ready = deque(i for i in range(n) if in_degree[i] == 0)
+        order = []
+        while ready:
+            i = ready.popleft()
+            order.append(i)
+            for j in targets[ptr[i]:ptr[i + 1]]:
+                in_degree[j] -= 1
+                if in_degree[j] == 0:
+                    ready.append(j)
+        return order
+
+    def _order(self, tasks: Sequence[Task]) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+        indptr, indices = self._compile(tasks)
+        order = self._kahn(indptr, indices)
+        if len(order) < len(tasks):
+            seen = set(order)
+            raise DependencyCycleError(
+                [t.task_id for i, t in enumerate(tasks) if i not in seen])
+        return indptr, indices, order
+
+    # ============ QUERIES ============
+
+    def topological_order(self, tasks: Sequence[Task]) -> List[Task]:
+        """
+        Tasks ordered so every task comes after the tasks blocking it
+        (otherwise keeping the input order as far as possible).
+
+        Raises:
+            DependencyCycleError: the edges among `tasks` form a cycle
+        """
+        _, _, order = self._order(tasks)
+        return [tasks[i] for i in order]
+
+    def critical_path(
+        self,
+        tasks: Sequence[Task],
+        durations: Optional[Sequence[float]] = None,
+    ) -> Dict:
+        """
+        Longest chain of dependent work through `tasks`.
+
+        Args:
+            tasks: Tasks to consider (completed ones take no time)
+            durations: Minutes per task, e.g.
+                       ExecutionDriftAnalyzer.predict_many(tasks)["ai_prediction"]
+                       (defaults to the user's estimates)
+
+        Returns:
+            Dict with:
+              - length: minutes along the critical path
+              - path: tasks on it, first to last
+              - earliest_start / latest_start / slack: minutes per task
+                (arrays aligned with `tasks`; slack 0 = on a critical path)
+        """
+        n = len(tasks)
+        if durations is None:
+            durations = [t.estimated_minutes for t in tasks]
+        duration = np.where(
+            [t.completed for t in tasks], 0.0, np.asarray(durations, dtype=float))
+        indptr, indices, order = self._order(tasks)
+        if n == 0:
+            empty = np.empty(0)
+            return {"length": 0.0, "path": [], "earliest_start": empty,
+                    "latest_start": empty, "slack": empty}
+
+        ptr = indptr.tolist()
+        targets = indices.tolist()
+        minutes = duration.tolist()
+
+        # Forward pass: earliest start, remembering the blocker that set it
+        earliest = [0.0] * n
+        via = [-1] * n
+        for i in order:
+            finish = earliest[i] + minutes[i]
+            for j in targets[ptr[i]:ptr[i + 1]]:
+                if finish > earliest[j]:
+                    earliest[j] = finish
+                    via[j] = i
+        finish_times = np.asarray(earliest) + duration
+        end = int(np.argmax(finish_times))
+        length = float(finish_times[end])
+
+        # Backward pass: latest start that doesn't delay the whole project
+        latest = [0.0] * n
+        for i in reversed(order):
+            following = targets[ptr[i]:ptr[i + 1]]
+            finish = min([latest[j] for j in following]) if following else length
+            latest[i] = finish - minutes[i]
+        latest_start = np.asarray(latest)
+
+        path = []
+        i = end
+        while i >= 0:
+            path.append(tasks[i])
+            i = via[i]
+        path.reverse()
+
+        earliest_start = np.asarray(earliest)
+        return {
+            "length": length,
+            "path": path,
+            "earliest_start": earliest_start,
+            "latest_start": latest_start,
+            "slack": np.maximum(0.0, latest_start - earliest_start),
+        }
+
+    def unblock_counts(self, tasks: Sequence[Task]) -> Dict[str, np.ndarray]:
+        """
+        How much finishing each task frees up.
+
+        Returns:
+            Dict of arrays aligned with `tasks`:
+              - unblocks: pending dependents for which this task is the last
+                pending blocker (finishing it lets them start)
+              - dependents: all pending direct dependents
+              - blocked_by: pending blockers this task is still waiting on
+        """
+        n = len(tasks)
+        indptr, indices = self._compile(tasks)
+        pending = ~np.array([t.completed for t in tasks], dtype=bool)
+        source = np.repeat(np.arange(n), np.diff(indptr))
+
+        # Only edges from a pending blocker to a pending dependent matter
+        live = pending[source] & pending[indices] if n else np.zeros(0, dtype=bool)
+        source, target = source[live], indices[live]
+        blocked_by = np.bincount(target, minlength=n)
+        return {
+            "unblocks": np.bincount(
+                source, weights=(blocked_by[target] == 1).astype(float),
+                minlength=n).astype(int),
+            "dependents": np.bincount(source, minlength=n),
+            "blocked_by": blocked_by,
+        }
@@ -0,0 +1,295 @@
+# core/llm_batch.py
+
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import json
+import random
+import time
+from core.llm_cache import LLMResponseCache, fingerprint
+from core.llm_client import LLMClient, get_llm_client, is_endpoint_error, is_retryable
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English/JSON)."""
+    return len(text) // 4 + 1
+
+
+def chunk_by_budget(
+    sizes: List[int], budget: int, max_items: int
+) -> List[List[int]]:
+    """
+    Split item positions into consecutive chunks whose summed size stays
+    within `budget` and which hold at most `max_items` items. An item
+    larger than the budget gets a chunk of its own.
+    """
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for i, size in enumerate(sizes):
+        if current and (used + size > budget or len(current) >= max_items):
+            chunks.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class ChunkedLLMScorer:
+    """
+    Scores a list of items with a chat model, several items per request.
+
+    Items are split into chunks that fit both a prompt-token budget and the
+    response budget (so replies aren't cut off mid-JSON), and the chunks are
+    sent concurrently, at most `concurrency` at a time. Results are merged
+    as chunks complete. A failed chunk is retried with jittered backoff; a
+    reply truncated at max_tokens is split in half and re-sent. Requests go
+    through the shared LLMClient's pooled async client, with its per-request
+    timeout and per-chunk deadline; outcomes feed its counters and circuit
+    breaker.
+
+    build_prompt(items) must ask for a JSON array of objects carrying an
+    "index" into the items it was given; indices are mapped back to
+    positions in the full list.
+    """
+
+    def __init__(
+        self,
+        build_prompt: Callable[[List[Dict]], str],
+        system_prompt: str,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.7,
+        max_prompt_tokens: int = 3000,
+        max_output_tokens: int = 1000,
+        output_tokens_per_item: int = 45,
+        concurrency: int = 4,
+        retries: int = 2,
+        cache: Optional[LLMResponseCache] = None,
+        cache_tag: str = "",
+        llm: Optional[LLMClient] = None,
+        validate_row: Optional[Callable[[Dict], bool]] = None,
+    ) -> None:
+        """
+        Args:
+            build_prompt: Builds the user prompt for one chunk of items
+            system_prompt: System message sent with every chunk
+            model: Chat model name
+            temperature: Sampling temperature
+            max_prompt_tokens: Token budget for the items in one prompt
+            max_output_tokens: max_tokens per request
+            output_tokens_per_item: Expected reply size per item
+            concurrency: Max requests in flight
+            retries: Extra attempts per chunk after a failure
+            cache: Optional per-chunk response cache
+            cache_tag: Extra cache key material (e.g. context and goals)
+            llm: Client to send requests through (defaults to the shared one)
+            validate_row: Drops reply rows it rejects; a chunk is only
+                          cached when every item got a valid row
+        """
+        self.build_prompt = build_prompt
+        self.system_prompt = system_prompt
+        self.model = model
+        self.temperature = temperature
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_output_tokens = max_output_tokens
+        self.output_tokens_per_item = output_tokens_per_item
+        self.concurrency = concurrency
+        self.retries = retries
+        self.cache = cache
+        self.cache_tag = cache_tag
+        self.llm = llm or get_llm_client()
+        self.validate_row = validate_row
+
+    # ============ CHUNKING ============
+
+    def chunks(self, items: List[Dict]) -> List[List[int]]:
+        """Positions of items grouped into request-sized chunks."""
+        sizes = [estimate_tokens(json.dumps(item, default=str)) for item in items]
+        # Leave headroom so a chatty reply still fits in max_tokens
+        max_items = max(
+            1, int(self.max_output_tokens * 0.8) // self.output_tokens_per_item)
+        return chunk_by_budget(sizes, self.max_prompt_tokens, max_items)
+
+    # ============ REQUESTS ============
+
+    async def _request(self, client, items: List[Dict], timeout: float):
+        """One completion request (transport only - the reply is parsed by the caller)."""
+        indexed = [dict(item, index=j) for j, item in enumerate(items)]
+        return await client.chat.completions.create(
+            timeout=timeout,
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": self.build_prompt(indexed)},
+            ],
+            temperature=self.temperature,
+            max_tokens=self.max_output_tokens,
+        )
+
+    @staticmethod
+    def _parse(response) -> Optional[List[Dict]]:
+        """Rows from a reply; None if it was cut off at max_tokens."""
+        choice = response.choices[0]
+        if choice.finish_reason == "length":
+            return None
+        rows = json.loads(choice.message.content)
+        if not isinstance(rows, list):
+            raise ValueError(f"expected a JSON array, got {type(rows).__name__}")
+        return rows
+
+    async def _score_chunk(
+        self,
+        client,
+        semaphore: asyncio.Semaphore,
+        items: List[Dict],
+        positions: List[int],
+    ) -> Dict[int, Dict]:
+        key = None
+        if self.cache is not None:
+            key = fingerprint("chunk", self.model, self.cache_tag,
+                              [items[p] for p in positions])
+            rows = self.cache.get(key)
+            if rows is not None:
+                return self._accept(rows, positions)
+
+        chunk = [items[p] for p in positions]
+        llm = self.llm
+        response = None
+        budget_end = None
+        for attempt in range(self.retries + 1):
+            async with semaphore:
+                # Shared breaker: stop hammering an endpoint that's down
+                if not llm.breaker.allow():
+                    if attempt:
+                        llm.settle(error)  # report the earlier failure once
+                    print(f"[ChunkedLLMScorer] Circuit open, skipping chunk of {len(chunk)}")
+                    return {}
+                start = time.monotonic()
+                if budget_end is None:
+                    # The deadline starts once the chunk gets a slot
+                    budget_end = start + llm.deadline
+                timeout = max(0.1, min(llm.timeout, budget_end - start))
+                try:
+                    response = await self._request(client, chunk, timeout)
+                    llm.record(time.monotonic() - start, ok=True)
+                    llm.settle(None)
+                    break
+                except Exception as e:
+                    error = e
+                    if is_endpoint_error(e):
+                        llm.record(time.monotonic() - start, ok=False)
+                    else:
+                        llm.breaker.release()
+            delay = llm.backoff * 2 ** attempt
+            delay += random.uniform(0, delay)
+            if (
+                attempt == self.retries
+                or not is_retryable(error)
+                or time.monotonic() + delay >= budget_end
+            ):
+                if is_endpoint_error(error):
+                    llm.settle(error)  # one breaker verdict per chunk
+                print(f"[ChunkedLLMScorer] Chunk of {len(chunk)} failed: {error}")
+                return {}
+            await asyncio.sleep(delay)
+
+        # A bad reply from a healthy endpoint: drop the chunk, no retry,
+        # and nothing recorded against the endpoint
+        try:
+            rows = self._parse(response)
+        except (TypeError, ValueError) as e:
+            print(f"[ChunkedLLMScorer] Unparseable reply for chunk of {len(chunk)}: {e}")
+            return {}
+
+        if rows is None:
+            # Reply hit max_tokens: split the chunk and try the halves
+            if len(positions) == 1:
+                return {}
+            mid = len(positions) // 2
+            halves = await asyncio.gather(
+                self._score_chunk(client, semaphore, items, positions[:mid]),
+                self._score_chunk(client, semaphore, items, positions[mid:]),
+            )
+            return {**halves[0], **halves[1]}
+
+        merged = self._accept(rows, positions)
+        # Partial or malformed replies aren't cached - the next call retries them
+        if key is not None and len(merged) == len(positions):
+            self.cache.set(key, rows)
+        return merged
+
+    def _accept(self, rows: List[Dict], positions: List[int]) -> Dict[int, Dict]:
+        """Merged rows that pass validate_row."""
+        merged = self._merge(rows, positions)
+        if self.validate_row is None:
+            return merged
+        return {p: row for p, row in merged.items() if self.validate_row(row)}
+
+    @staticmethod
+    def _merge(rows: List[Dict], positions: List[int]) -> Dict[int, Dict]:
+        merged = {}
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            j = row.get("index")
+            if isinstance(j, int) and 0 <= j < len(positions):
+                merged[positions[j]] = row
+        return merged
+
+    async def _score_all(
+        self,
+        items: List[Dict],
+        on_result: Optional[Callable[[Dict[int, Dict]], Any]],
+    ) -> Dict[int, Dict]:
+        """Score every chunk; runs on the shared client's event loop."""
+        client = self.llm.get_async_client()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: Dict[int, Dict] = {}
+        pending = [
+            self._score_chunk(client, semaphore, items, positions)
+            for positions in self.chunks(items)
+        ]
+        for finished in asyncio.as_completed(pending):
+            chunk_result = await finished
+            results.update(chunk_result)
+            if on_result is not None and chunk_result:
+                on_result(chunk_result)
+        return results
+
+    async def score_async(
+        self,
+        items: List[Dict],
+        on_result: Optional[Callable[[Dict[int, Dict]], Any]] = None,
+    ) -> Dict[int, Dict]:
+        """
+        Score all items concurrently.
+
+        The requests run on the shared client's event loop (whatever loop
+        this is awaited from), so on_result is called from that loop.
+
+        Args:
+            items: Item descriptions (JSON-able dicts)
+            on_result: Called with each chunk's {position: row} as it lands
+
+        Returns:
+            {position in items: reply row} for every item that was scored
+        """
+        if not items:
+            return {}
+        loop = self.llm.loop
+        if asyncio.get_running_loop() is loop:
+            return await self._score_all(items, on_result)
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(
+            self._score_all(items, on_result), loop))
+
+    def score(
+        self,
+        items: List[Dict],
+        on_result: Optional[Callable[[Dict[int, Dict]], Any]] = None,
+    ) -> Dict[int, Dict]:
+        """Blocking wrapper around score_async (safe inside a running loop)."""
+        if not items:
+            return {}
+        return self.llm.run_async(self._score_all(items, on_result))
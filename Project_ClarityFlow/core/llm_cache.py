@@ -0,0 +1,230 @@
+# core/llm_cache.py
+
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Canonical hash of JSON-able parts (key order and whitespace don't
+    matter), used as the cache key for an LLM request.
+    """
+    canonical = json.dumps(
+        parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def default_cache_path() -> str:
+    base = os.getenv("CLARITYFLOW_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "clarityflow")
+    return os.path.join(base, "llm_cache.sqlite")
+
+
+class LLMResponseCache:
+    """
+    Persistent cache for parsed LLM responses.
+
+    Entries live in a SQLite file (so they survive app restarts and are
+    shared by every session on the machine) with a small in-memory LRU in
+    front of it, so repeat hits never touch disk. Entries expire after
+    `ttl_seconds`; when the file grows past `max_entries` or `max_bytes`
+    the least recently used entries are evicted.
+
+    get_or_compute() coalesces misses: if several threads ask for the same
+    key while a request is in flight, they all wait on that one request.
+    Its `validate` hook keeps bad replies (empty, unparseable, missing
+    fields) out of the cache so they aren't served for the whole TTL.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_entries: int = 5000,
+        max_bytes: int = 50 * 1024 * 1024,
+        memory_entries: int = 256,
+    ) -> None:
+        """
+        Args:
+            path: SQLite file (":memory:" for a throwaway cache)
+            ttl_seconds: How long a response stays valid
+            max_entries: Entry limit for the disk store
+            max_bytes: Size limit (serialized values) for the disk store
+            memory_entries: Size of the in-memory LRU front
+        """
+        self.path = path or default_cache_path()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires REAL NOT NULL, accessed REAL NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self._conn.commit()
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evicted": 0}
+
+    # ============ LOOKUP ============
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None if absent/expired."""
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                expires, value = hit
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._conn.commit()
+                return None
+
+            self._conn.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value."""
+        now = time.time()
+        expires = now + self.ttl_seconds
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, payload, expires, now, len(payload)),
+            )
+            self._evict(now)
+            self._conn.commit()
+            self._remember(key, expires, value)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        validate: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Cached value for key, otherwise compute() it once and store it.
+        Exceptions from compute() are re-raised to every waiting caller and
+        nothing is cached. A value that fails validate() is returned to
+        the waiting callers but not stored.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = Future()
+                self._inflight[key] = pending
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return pending.result()
+
+        try:
+            value = compute()
+            if validate is None or validate(value):
+                self.set(key, value)
+            pending.set_result(value)
+            return value
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    # ============ INTERNALS ============
+
+    def _remember(self, key: str, expires: float, value: Any) -> None:
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows, then LRU rows until under both limits."""
+        cur = self._conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        evicted = cur.rowcount
+
+        count, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count > self.max_entries or size > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed").fetchall()
+            drop = []
+            for key, row_size in rows:
+                if count <= self.max_entries and size <= self.max_bytes:
+                    break
+                drop.append((key,))
+                count -= 1
+                size -= row_size
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", drop)
+            for (key,) in drop:
+                self._memory.pop(key, None)
+            evicted += len(drop)
+        self.stats["evicted"] += max(evicted, 0)
+
+
+_DEFAULT_CACHE: Optional[LLMResponseCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_default_cache() -> LLMResponseCache:
+    """
+    Process-wide cache at default_cache_path(), created on first use.
+    Falls back to an in-memory cache if the file can't be opened.
+    """
+    global _DEFAULT_CACHE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CACHE is None:
+            try:
+                _DEFAULT_CACHE = LLMResponseCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"[LLMResponseCache] Disk cache unavailable: {e}")
+                _DEFAULT_CACHE = LLMResponseCache(":memory:")
+        return _DEFAULT_CACHE
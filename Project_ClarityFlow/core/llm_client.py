@@ -0,0 +1,335 @@
+# core/llm_client.py
+
+from __future__ import annotations
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import os
+import random
+import threading
+import time
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and calls
+    fail fast for `reset_timeout` seconds. Then one trial call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """True if a call may go out now (claims the half-open trial slot)."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected (no trial slot free)."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            return state == "open" or (state == "half_open" and self._trial_in_flight)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Give back a claimed trial slot without judging the endpoint."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+def is_endpoint_error(error: Exception) -> bool:
+    """
+    Transport or HTTP errors - the only failures that say something about
+    the endpoint's health (a malformed reply or a bug in our code doesn't).
+    """
+    try:
+        from openai import APIConnectionError, APIStatusError
+    except ImportError:
+        return False
+    return isinstance(error, (APIConnectionError, APIStatusError))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection errors, 429s and 5xx are worth retrying."""
+    try:
+        from openai import APIConnectionError, APITimeoutError
+    except ImportError:
+        return False
+    if isinstance(error, (APITimeoutError, APIConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+class LLMClient:
+    """
+    Shared OpenAI client for every LLM feature in the app.
+
+    The underlying OpenAI client (and its HTTP connection pool) is created
+    on first use rather than at import time, and reused by all callers.
+    Async callers (the chunked batch scorer) share one AsyncOpenAI client
+    too; it lives on a background event loop so its connections survive
+    between calls.
+    Each call gets an overall deadline, transient failures are retried
+    with jittered exponential backoff, and a circuit breaker makes callers
+    fall back to their heuristics immediately while the endpoint is
+    unhealthy. Latency and error counters are available from stats().
+    """
+
+    def __init__(
+        self,
+        timeout: float = 20.0,
+        deadline: float = 45.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        """
+        Args:
+            timeout: Per-attempt request timeout in seconds
+            deadline: Total time budget for a call, retries included
+            retries: Extra attempts after a transient failure
+            backoff: Base backoff delay in seconds (doubles per attempt)
+            breaker: Circuit breaker (defaults to 5 failures / 30s)
+        """
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._client = None
+        self._async_client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=500)
+        self._counters = {
+            "calls": 0, "successes": 0, "errors": 0,
+            "retries": 0, "short_circuited": 0,
+        }
+
+    # ============ SETUP ============
+
+    @staticmethod
+    def configured() -> bool:
+        """True if an API key is set and the openai package is installed."""
+        if not os.getenv("OPENAI_API_KEY"):
+            return False
+        try:
+            import openai  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def available(self) -> bool:
+        """True if calls can be attempted right now (configured, circuit not open)."""
+        return self.configured() and not self.breaker.is_open()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+                self._client = OpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    base_url=os.getenv("OPENAI_BASE_URL"),
+                    timeout=self.timeout,
+                    max_retries=0,  # retries are handled here
+                )
+            return self._client
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop (on a daemon thread) that owns the async client."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="clarityflow-llm-loop", daemon=True).start()
+            return self._loop
+
+    def get_async_client(self):
+        """
+        Shared AsyncOpenAI client. Only use it on `loop` (see run_async):
+        its connection pool is bound to that event loop.
+        """
+        with self._lock:
+            if self._async_client is None:
+                from openai import AsyncOpenAI
+                self._async_client = AsyncOpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    base_url=os.getenv("OPENAI_BASE_URL"),
+                    timeout=self.timeout,
+                    max_retries=0,  # retries are handled by the callers
+                )
+            return self._async_client
+
+    def run_async(self, coro: Awaitable) -> Any:
+        """
+        Run a coroutine on the shared loop and wait for its result. Safe to
+        call from inside another running event loop, but not from the
+        shared loop itself.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    # ============ CALLS ============
+
+    def call(self, fn: Callable[[Any, float], Any], deadline: Optional[float] = None) -> Any:
+        """
+        Run fn(client, timeout) with retries, deadline and circuit breaker.
+
+        fn should only make the request; parse the reply outside it, so a
+        malformed reply isn't mistaken for an endpoint failure. The breaker
+        sees one outcome per call, after retries, and only counts outages
+        (timeouts, connection errors, 429, 5xx) - not 4xx client errors.
+
+        Raises:
+            CircuitOpenError: the endpoint is marked unhealthy
+            Exception: the last error once retries or the deadline run out
+        """
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError("LLM endpoint unhealthy - circuit open")
+
+        client = self._get_client()
+        budget_end = time.monotonic() + (deadline or self.deadline)
+        self._count("calls")
+        attempt = 0
+        while True:
+            remaining = budget_end - time.monotonic()
+            start = time.monotonic()
+            try:
+                result = fn(client, max(0.1, min(self.timeout, remaining)))
+            except Exception as e:
+                if not is_endpoint_error(e):
+                    # Not the endpoint's fault - don't count it against it
+                    self.breaker.release()
+                    raise
+                self.record(time.monotonic() - start, ok=False)
+                delay = self.backoff * 2 ** attempt
+                delay += random.uniform(0, delay)
+                if (
+                    attempt >= self.retries
+                    or not is_retryable(e)
+                    or time.monotonic() + delay >= budget_end
+                    or not self.breaker.allow()
+                ):
+                    self.settle(e)
+                    raise
+                attempt += 1
+                self._count("retries")
+                time.sleep(delay)
+                continue
+            self.record(time.monotonic() - start, ok=True)
+            self.settle(None)
+            return result
+
+    def chat(self, **kwargs) -> Any:
+        """chat.completions.create(**kwargs) through call()."""
+        return self.call(
+            lambda client, timeout: client.chat.completions.create(
+                timeout=timeout, **kwargs))
+
+    def respond(self, **kwargs) -> Any:
+        """responses.create(**kwargs) through call()."""
+        return self.call(
+            lambda client, timeout: client.responses.create(
+                timeout=timeout, **kwargs))
+
+    # ============ METRICS ============
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def record(self, latency: float, ok: bool) -> None:
+        """Record one attempt's latency and outcome (also used by the async batcher)."""
+        with self._lock:
+            self._latencies.append(latency)
+            self._counters["successes" if ok else "errors"] += 1
+
+    def settle(self, error: Optional[Exception]) -> None:
+        """
+        Report a logical call's final outcome to the circuit breaker, once
+        retries are over: None = success; outages count as one failure;
+        anything else (4xx, bad input) frees the breaker without a verdict.
+        """
+        if error is None:
+            self.breaker.record_success()
+        elif is_retryable(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    def stats(self) -> Dict:
+        """Counters, latency percentiles (seconds) and breaker state."""
+        with self._lock:
+            counters = dict(self._counters)
+            latencies = sorted(self._latencies)
+
+        def pct(q: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+        counters.update({
+            "latency_mean": sum(latencies) / len(latencies) if latencies else None,
+            "latency_p50": pct(0.5),
+            "latency_p95": pct(0.95),
+            "circuit": self.breaker.state,
+        })
+        return counters
+
+
+_SHARED: Optional[LLMClient] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """The process-wide LLMClient (created on first use)."""
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = LLMClient()
+        return _SHARED
@@ -1,23 +1,36 @@
 # features/cognitive_load.py
 
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Optional
 from core.models import Task
+from core.capacity import CapacityModel
 
 
 class CognitiveLoadDetector:
     """Calculates and predicts cognitive load for a given schedule (list of tasks)."""
 
     @staticmethod
-    def calculate_load(schedule: List[Task]) -> Dict:
+    def calculate_load(
+        schedule: List[Task], capacity: Optional[CapacityModel] = None
+    ) -> Dict:
+        """
+        Args:
+            schedule: The day's tasks
+            capacity: Calendar capacity (defaults to a fixed 8-hour day)
+        """
         if not schedule:
             return {"score": 0, "components": {}, "level": "low"}
 
         total_time = sum(t.estimated_minutes for t in schedule) or 1
         available_hours = 8
+        if capacity is not None:
+            available_hours = capacity.available_minutes(
+                schedule[0].time_of_day.date()) / 60
 
         # Task density score (how packed the day is)
-        task_density = len(schedule) / available_hours
+        task_density = (
+            len(schedule) / available_hours if available_hours > 0 else float("inf")
+        )
         task_density_score = min(100, task_density * 20)
 
         # Complexity score (complexity weighted by time)
@@ -1,12 +1,24 @@
 # features/decision_fatigue.py
 
 from __future__ import annotations
-from typing import List, Dict
-from datetime import date
+from typing import List, Dict, Optional
+from collections import Counter
+from datetime import date, datetime, timedelta
+import numpy as np
 import pandas as pd
 from core.models import Task
 
 
+FATIGUE_COLUMNS = [
+    "fatigue_score",
+    "task_load_score",
+    "interrupt_score",
+    "switch_score",
+    "late_work_score",
+    "complexity_score",
+]
+
+
 class DecisionFatigueMonitor:
     """
     Estimates decision fatigue per day (0–100).
@@ -59,34 +71,403 @@ class DecisionFatigueMonitor:
 
         # Normalize components into 0–100-ish scores
         # You can tweak these weights over time.
-        max_tasks = max(5, daily["tasks"].max())
-        max_interruptions = max(3, daily["total_interruptions"].max())
-        max_switches = max(3, daily["total_switches"].max())
-
-        daily["task_load_score"] = (daily["tasks"] / max_tasks) * 100
-        daily["interrupt_score"] = (
-            daily["total_interruptions"] / max_interruptions) * 100
-        daily["switch_score"] = (daily["total_switches"] / max_switches) * 100
-        daily["late_work_score"] = daily["latest_hour"].apply(
-            lambda h: 0 if h <= 17 else min(100, (h - 17) * 20)
+        norms = DecisionFatigueMonitor.normalizers(
+            daily["tasks"].max(),
+            daily["total_interruptions"].max(),
+            daily["total_switches"].max(),
+        )
+        scores = DecisionFatigueMonitor.score_components(
+            daily["tasks"].to_numpy(),
+            daily["avg_complexity"].to_numpy(),
+            daily["total_interruptions"].to_numpy(),
+            daily["total_switches"].to_numpy(),
+            daily["latest_hour"].to_numpy(),
+            norms,
+        )
+        for col, values in scores.items():
+            daily[col] = values
+
+        return daily[["date"] + FATIGUE_COLUMNS]
+
+    @staticmethod
+    def compute_intraday_fatigue(tasks: List[Task]) -> pd.DataFrame:
+        """
+        Fatigue building up task by task through each day.
+
+        Tasks are sorted by time and cumulative sums are taken per date
+        (grouped cumsum/cummax over all days at once). Each row scores the
+        day "so far" with the same normalizers as compute_daily_fatigue, so
+        a day's last row equals its daily fatigue_score.
+
+        Returns:
+            Long-format DataFrame: date, time, task_id, task_type,
+            task_number, fatigue_score and components - one row per task
+        """
+        rows = [
+            {
+                "date": t.time_of_day.date(),
+                "time": t.time_of_day,
+                "task_id": t.task_id,
+                "task_type": t.task_type,
+                "hour": t.time_of_day.hour,
+                "complexity": t.complexity_score,
+                "interruptions": t.interruption_count,
+                "context_switches": t.context_switches,
+            }
+            for t in tasks
+            if t.completed
+        ]
+        if not rows:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(rows).sort_values(["date", "time"], kind="stable")
+        by_day = df.groupby("date", sort=False)
+        task_number = by_day.cumcount().to_numpy() + 1
+        cum = by_day[["complexity", "interruptions", "context_switches"]].cumsum()
+        latest_hour = by_day["hour"].cummax()
+
+        # Normalizers come from full-day totals, as in the daily view
+        day_totals = by_day[["interruptions", "context_switches"]].sum()
+        norms = DecisionFatigueMonitor.normalizers(
+            by_day.size().max(),
+            day_totals["interruptions"].max(),
+            day_totals["context_switches"].max(),
+        )
+        scores = DecisionFatigueMonitor.score_components(
+            task_number,
+            cum["complexity"].to_numpy() / task_number,
+            cum["interruptions"].to_numpy(),
+            cum["context_switches"].to_numpy(),
+            latest_hour.to_numpy(),
+            norms,
+        )
+
+        out = df[["date", "time", "task_id", "task_type"]].copy()
+        out["task_number"] = task_number
+        for col, values in scores.items():
+            out[col] = values
+        return out.reset_index(drop=True)
+
+    @staticmethod
+    def forecast_fatigue(
+        tasks: List[Task],
+        days: int = 7,
+        start: Optional[date] = None,
+    ) -> pd.DataFrame:
+        """
+        Forecast fatigue for the next `days` days from planned tasks.
+
+        Interruptions and context switches aren't known in advance, so each
+        planned task gets its task type's historical average (overall
+        average for unseen types). All planned days are then aggregated and
+        scored in one batched call, with normalizers taken over history and
+        forecast together so both are on the same scale.
+
+        Args:
+            tasks: Full task list (completed = history, incomplete = plan)
+            days: Horizon length
+            start: First forecast date (defaults to today)
+
+        Returns:
+            DataFrame with date, planned_tasks, expected_interruptions,
+            expected_switches, fatigue_score and components (one row per
+            day in the horizon; days with nothing planned score 0)
+        """
+        start = start or datetime.now().date()
+        horizon = [start + timedelta(days=i) for i in range(days)]
+
+        history = pd.DataFrame(
+            [
+                {
+                    "date": t.time_of_day.date(),
+                    "task_type": t.task_type,
+                    "interruptions": t.interruption_count,
+                    "context_switches": t.context_switches,
+                }
+                for t in tasks
+                if t.completed
+            ],
+            columns=["date", "task_type", "interruptions", "context_switches"],
+        )
+        planned = pd.DataFrame(
+            [
+                {
+                    "date": t.time_of_day.date(),
+                    "task_type": t.task_type,
+                    "hour": t.time_of_day.hour,
+                    "complexity": t.complexity_score,
+                }
+                for t in tasks
+                if not t.completed and start <= t.time_of_day.date() <= horizon[-1]
+            ],
+            columns=["date", "task_type", "hour", "complexity"],
+        )
+
+        # Historical per-type rates, mapped onto every planned task at once
+        cols = ["interruptions", "context_switches"]
+        overall = history[cols].mean().fillna(0.0)
+        type_rates = history.groupby("task_type")[cols].mean()
+        for col in cols:
+            planned[col] = (
+                planned["task_type"].map(type_rates[col]).fillna(overall[col])
+            )
+
+        daily = (
+            planned.groupby("date")
+            .agg(
+                planned_tasks=("task_type", "size"),
+                avg_complexity=("complexity", "mean"),
+                expected_interruptions=("interruptions", "sum"),
+                expected_switches=("context_switches", "sum"),
+                latest_hour=("hour", "max"),
+            )
+            .reindex(horizon)
+            .fillna(0)
         )
-        daily["complexity_score"] = daily["avg_complexity"] / 5 * 100
+        daily.index.name = "date"
+
+        hist_days = history.groupby("date")
+        norms = DecisionFatigueMonitor.normalizers(
+            max(hist_days.size().max() if len(history) else 0,
+                daily["planned_tasks"].max()),
+            max(hist_days["interruptions"].sum().max() if len(history) else 0,
+                daily["expected_interruptions"].max()),
+            max(hist_days["context_switches"].sum().max() if len(history) else 0,
+                daily["expected_switches"].max()),
+        )
+        scores = DecisionFatigueMonitor.score_components(
+            daily["planned_tasks"].to_numpy(dtype=float),
+            daily["avg_complexity"].to_numpy(dtype=float),
+            daily["expected_interruptions"].to_numpy(dtype=float),
+            daily["expected_switches"].to_numpy(dtype=float),
+            daily["latest_hour"].to_numpy(dtype=float),
+            norms,
+        )
+        out = daily[
+            ["planned_tasks", "expected_interruptions", "expected_switches"]
+        ].reset_index()
+        out["planned_tasks"] = out["planned_tasks"].astype(int)
+        for col, values in scores.items():
+            out[col] = values
+        return out
+
+    @staticmethod
+    def fatigue_trend(daily: pd.DataFrame, window_days: int = 7) -> pd.DataFrame:
+        """
+        Add a `trend` column: rolling mean of fatigue_score over the last
+        `window_days` calendar days (gaps in the dates are respected).
+
+        Args:
+            daily: Output of compute_daily_fatigue (or forecast_fatigue)
+            window_days: Rolling window length in days
+        """
+        if daily.empty:
+            return daily
+        out = daily.sort_values("date").reset_index(drop=True)
+        scores = out.set_index(pd.to_datetime(out["date"]))["fatigue_score"]
+        out["trend"] = (
+            scores.rolling(f"{window_days}D", min_periods=1).mean().to_numpy()
+        )
+        return out
+
+    @staticmethod
+    def normalizers(
+        max_tasks: float, max_interruptions: float, max_switches: float
+    ) -> Dict[str, float]:
+        """Global normalizers from the per-day maxima (with floors)."""
+        return {
+            "max_tasks": max(5, max_tasks),
+            "max_interruptions": max(3, max_interruptions),
+            "max_switches": max(3, max_switches),
+        }
+
+    @staticmethod
+    def score_components(
+        tasks: np.ndarray,
+        avg_complexity: np.ndarray,
+        total_interruptions: np.ndarray,
+        total_switches: np.ndarray,
+        latest_hour: np.ndarray,
+        norms: Dict[str, float],
+    ) -> Dict[str, np.ndarray]:
+        """Fatigue score and components, elementwise over per-day arrays."""
+        task_load_score = (tasks / norms["max_tasks"]) * 100
+        interrupt_score = (
+            total_interruptions / norms["max_interruptions"]) * 100
+        switch_score = (total_switches / norms["max_switches"]) * 100
+        late_work_score = np.where(
+            latest_hour <= 17, 0, np.minimum(100, (latest_hour - 17) * 20))
+        complexity_score = avg_complexity / 5 * 100
 
         # Weighted fatigue score
-        daily["fatigue_score"] = (
-            0.30 * daily["task_load_score"]
-            + 0.25 * daily["interrupt_score"]
-            + 0.20 * daily["switch_score"]
-            + 0.15 * daily["late_work_score"]
-            + 0.10 * daily["complexity_score"]
+        fatigue_score = (
+            0.30 * task_load_score
+            + 0.25 * interrupt_score
+            + 0.20 * switch_score
+            + 0.15 * late_work_score
+            + 0.10 * complexity_score
+        )
+
+        return {
+            "fatigue_score": fatigue_score,
+            "task_load_score": task_load_score,
+            "interrupt_score": interrupt_score,
+            "switch_score": switch_score,
+            "late_work_score": late_work_score,
+            "complexity_score": complexity_score,
+        }
+
+
+class DailyFatigueTable:
+    """
+    Materialized per-date fatigue table that updates incrementally.
+
+    Keeps per-date aggregates (task count, complexity sum, interruptions,
+    switches, latest hour) and their scores. Adding a task touches only its
+    date. The global normalizers are per-day maxima tracked with value
+    counts, so they're maintained without scanning history; all dates are
+    rescored only when a normalizer actually changes.
+    """
+
+    NORM_FIELDS = {
+        "max_tasks": "tasks",
+        "max_interruptions": "total_interruptions",
+        "max_switches": "total_switches",
+    }
+
+    def __init__(self) -> None:
+        self._agg: Dict[date, Dict[str, float]] = {}
+        self._scores: Dict[date, Dict[str, float]] = {}
+        # field -> Counter of per-date values, for maintaining maxima
+        self._values = {f: Counter() for f in self.NORM_FIELDS.values()}
+        self._raw_max = {f: 0 for f in self.NORM_FIELDS.values()}
+        self._norms = DecisionFatigueMonitor.normalizers(0, 0, 0)
+        self.full_rescores = 0
+
+    @classmethod
+    def from_tasks(cls, tasks: List[Task]) -> "DailyFatigueTable":
+        table = cls()
+        by_date: Dict[date, List[Task]] = {}
+        for t in tasks:
+            if t.completed:
+                by_date.setdefault(t.time_of_day.date(), []).append(t)
+        for day, day_tasks in by_date.items():
+            table._set_aggregate(day, cls._aggregate(day_tasks))
+        table._rescore_all()
+        return table
+
+    @staticmethod
+    def _aggregate(tasks: List[Task]) -> Optional[Dict[str, float]]:
+        if not tasks:
+            return None
+        return {
+            "tasks": len(tasks),
+            "complexity_sum": sum(t.complexity_score for t in tasks),
+            "total_interruptions": sum(t.interruption_count for t in tasks),
+            "total_switches": sum(t.context_switches for t in tasks),
+            "latest_hour": max(t.time_of_day.hour for t in tasks),
+        }
+
+    # ============ UPDATES ============
+
+    def add_task(self, task: Task) -> None:
+        """Fold a newly completed task into its date."""
+        if not task.completed:
+            return
+        day = task.time_of_day.date()
+        old = self._agg.get(day)
+        new = dict(old) if old else {
+            "tasks": 0, "complexity_sum": 0.0, "total_interruptions": 0,
+            "total_switches": 0, "latest_hour": 0,
+        }
+        new["tasks"] += 1
+        new["complexity_sum"] += task.complexity_score
+        new["total_interruptions"] += task.interruption_count
+        new["total_switches"] += task.context_switches
+        new["latest_hour"] = max(new["latest_hour"], task.time_of_day.hour)
+        self._apply(day, new)
+
+    def set_date(self, day: date, tasks: List[Task]) -> None:
+        """
+        Replace one date's tasks (for edits/deletions). Only completed
+        tasks on `day` count; an empty list removes the date.
+        """
+        done = [t for t in tasks if t.completed and t.time_of_day.date() == day]
+        self._apply(day, self._aggregate(done))
+
+    def _set_aggregate(self, day: date, new: Optional[Dict]) -> None:
+        """Store a date's aggregate and keep the max counters in step."""
+        old = self._agg.get(day)
+        for field, counter in self._values.items():
+            if old is not None:
+                counter[old[field]] -= 1
+                if counter[old[field]] == 0:
+                    del counter[old[field]]
+            if new is not None:
+                counter[new[field]] += 1
+        if new is None:
+            self._agg.pop(day, None)
+            self._scores.pop(day, None)
+        else:
+            self._agg[day] = new
+        for field, counter in self._values.items():
+            if not counter:
+                self._raw_max[field] = 0
+            elif new is not None and new[field] >= self._raw_max[field]:
+                self._raw_max[field] = new[field]
+            elif self._raw_max[field] not in counter:
+                # The max value lost its last date: find the next one
+                self._raw_max[field] = max(counter, default=0)
+
+    def _apply(self, day: date, new: Optional[Dict]) -> None:
+        self._set_aggregate(day, new)
+        norms = DecisionFatigueMonitor.normalizers(
+            *(self._raw_max[f] for f in self.NORM_FIELDS.values()))
+        if norms != self._norms:
+            self._rescore_all()
+        elif new is not None:
+            self._scores[day] = self._score([day])[day]
+
+    # ============ SCORING ============
+
+    def _score(self, days: List[date]) -> Dict[date, Dict[str, float]]:
+        """Score the given dates in one vectorized call."""
+        agg = [self._agg[d] for d in days]
+        tasks = np.array([a["tasks"] for a in agg], dtype=float)
+        scores = DecisionFatigueMonitor.score_components(
+            tasks,
+            np.array([a["complexity_sum"] for a in agg]) / tasks,
+            np.array([a["total_interruptions"] for a in agg], dtype=float),
+            np.array([a["total_switches"] for a in agg], dtype=float),
+            np.array([a["latest_hour"] for a in agg], dtype=float),
+            self._norms,
         )
+        return {
+            d: {col: float(scores[col][i]) for col in FATIGUE_COLUMNS}
+            for i, d in enumerate(days)
+        }
+
+    def _rescore_all(self) -> None:
+        self._norms = DecisionFatigueMonitor.normalizers(
+            *(self._raw_max[f] for f in self.NORM_FIELDS.values()))
+        self._scores = self._score(list(self._agg)) if self._agg else {}
+        self.full_rescores += 1
 
-        return daily[[
-            "date",
-            "fatigue_score",
-            "task_load_score",
-            "interrupt_score",
-            "switch_score",
-            "late_work_score",
-            "complexity_score",
-        ]]
+    # ============ READS ============
+
+    @property
+    def norms(self) -> Dict[str, float]:
+        return dict(self._norms)
+
+    def score_for(self, day: date) -> Optional[Dict[str, float]]:
+        return self._scores.get(day)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Same shape as DecisionFatigueMonitor.compute_daily_fatigue."""
+        if not self._scores:
+            return pd.DataFrame()
+        days = sorted(self._scores)
+        return pd.DataFrame(
+            [{"date": d, **self._scores[d]} for d in days],
+            columns=["date"] + FATIGUE_COLUMNS,
+        )
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 from typing import List, Dict
+import numpy as np
 import pandas as pd
 import xgboost as xgb
 from sklearn.metrics import mean_absolute_error
@@ -16,6 +17,8 @@ class ExecutionDriftAnalyzer:
 
     def __init__(self) -> None:
         self.model: xgb.XGBRegressor | None = None
+        # Held-out drift_ratio residuals (actual - predicted) from train()
+        self.residuals: np.ndarray | None = None
         self.feature_columns = [
             "estimated_minutes",
             "task_type_encoded",
@@ -83,27 +86,21 @@ class ExecutionDriftAnalyzer:
 
         y_pred = self.model.predict(X_test)
         mae = mean_absolute_error(y_test, y_pred)
+        self.residuals = y_test.to_numpy(dtype=float) - y_pred
 
         return {"status": "success", "mae": mae, "samples": len(df)}
 
-    def predict(self, task: Task) -> Dict:
-        """Predict actual duration for a task, returning both user + AI estimate."""
-        if self.model is None:
-            # Fall back to a simple heuristic
-            return {
-                "user_estimate": task.estimated_minutes,
-                "ai_prediction": round(task.estimated_minutes * 1.2, 1),
-                "method": "heuristic",
-            }
-
-        hour = task.time_of_day.hour
-        try:
-            task_type_encoded = TASK_TYPES.index(task.task_type)
-        except ValueError:
-            task_type_encoded = len(TASK_TYPES)
+    def _prediction_features(self, tasks: List[Task]) -> pd.DataFrame:
+        """Model input frame for (possibly incomplete) tasks."""
+        rows = []
+        for task in tasks:
+            hour = task.time_of_day.hour
+            try:
+                task_type_encoded = TASK_TYPES.index(task.task_type)
+            except ValueError:
+                task_type_encoded = len(TASK_TYPES)
 
-        features = pd.DataFrame(
-            [
+            rows.append(
                 {
                     "estimated_minutes": task.estimated_minutes,
                     "task_type_encoded": task_type_encoded,
@@ -115,8 +112,20 @@ class ExecutionDriftAnalyzer:
                     "interruption_count": task.interruption_count,
                     "context_switches": task.context_switches,
                 }
-            ]
-        )[self.feature_columns]
+            )
+        return pd.DataFrame(rows, columns=self.feature_columns)
+
+    def predict(self, task: Task) -> Dict:
+        """Predict actual duration for a task, returning both user + AI estimate."""
+        if self.model is None:
+            # Fall back to a simple heuristic
+            return {
+                "user_estimate": task.estimated_minutes,
+                "ai_prediction": round(task.estimated_minutes * 1.2, 1),
+                "method": "heuristic",
+            }
+
+        features = self._prediction_features([task])
 
         drift_ratio = float(self.model.predict(features)[0])
         corrected_duration = task.estimated_minutes * drift_ratio
@@ -127,3 +136,29 @@ class ExecutionDriftAnalyzer:
             "drift_ratio": drift_ratio,
             "method": "ml_model",
         }
+
+    def predict_many(self, tasks: List[Task]) -> pd.DataFrame:
+        """
+        Batched predict(): one model call for the whole list.
+
+        Returns:
+            DataFrame (one row per task, same order) with user_estimate,
+            ai_prediction and drift_ratio
+        """
+        estimated = np.array([t.estimated_minutes for t in tasks], dtype=float)
+
+        if self.model is None:
+            drift_ratio = np.full(len(tasks), 1.2)
+        elif not tasks:
+            drift_ratio = np.empty(0)
+        else:
+            features = self._prediction_features(tasks)
+            drift_ratio = self.model.predict(features).astype(float)
+
+        return pd.DataFrame(
+            {
+                "user_estimate": estimated,
+                "ai_prediction": np.round(estimated * drift_ratio, 1),
+                "drift_ratio": drift_ratio,
+            }
+        )
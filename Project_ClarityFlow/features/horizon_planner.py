@@ -0,0 +1,284 @@
+# features/horizon_planner.py
+
+from __future__ import annotations
+from typing import List, Dict, Optional
+from dataclasses import replace
+from datetime import datetime, date, timedelta
+import pandas as pd
+from core.capacity import CapacityModel
+from core.models import Task
+from features.decision_fatigue import DecisionFatigueMonitor
+from features.execution_drift import ExecutionDriftAnalyzer
+
+
+class RollingHorizonPlanner:
+    """
+    Spreads a backlog (e.g. the overflow of suggest_schedule_reordering)
+    over the next N working days.
+
+    Each day's budget is its free calendar time, minus time already
+    committed to other pending tasks that day, scaled down on days whose
+    forecast fatigue is above `fatigue_threshold`. That budget forecast
+    only sees history and the committed tasks (where backlog tasks land
+    isn't known yet); the fatigue_score reported by result() is the
+    forecast for the finished plan, with backlog tasks on their planned
+    days. Task lengths are the ExecutionDriftAnalyzer's predictions rather
+    than the user's estimates.
+
+    Tasks are assigned first-fit in priority order: each one goes to the
+    earliest day that still has room. With first-fit, a day's assignment
+    depends only on that day and earlier ones, so when one day changes
+    (a meeting lands, a task moves) only that day and the days after it
+    are re-planned - the result is identical to re-planning everything.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[CapacityModel] = None,
+        drift_analyzer: Optional[ExecutionDriftAnalyzer] = None,
+        horizon_days: int = 5,
+        fatigue_threshold: float = 60.0,
+        max_fatigue_cut: float = 0.5,
+    ) -> None:
+        """
+        Args:
+            capacity: Working hours and blocked time per day
+            drift_analyzer: Predicts real durations (estimates used if None)
+            horizon_days: Number of working days to plan
+            fatigue_threshold: Fatigue score above which a day's budget shrinks
+            max_fatigue_cut: Budget fraction removed at fatigue score 100
+        """
+        self.capacity = capacity or CapacityModel()
+        self.drift_analyzer = drift_analyzer
+        self.horizon_days = horizon_days
+        self.fatigue_threshold = fatigue_threshold
+        self.max_fatigue_cut = max_fatigue_cut
+
+        self.days: List[date] = []
+        self.free: Dict[date, float] = {}
+        self.committed: Dict[date, float] = {}
+        self.fatigue: Dict[date, float] = {}
+        self.budget: Dict[date, float] = {}
+        self.assignments: Dict[date, List[Dict]] = {}
+        self.unplaced: List[Dict] = []
+        self._entries: List[Dict] = []   # backlog in priority order
+        self._day_of: Dict[str, int] = {}  # task_id -> day index (-1 unplaced)
+        self._history: List[Task] = []     # completed tasks (fatigue rates)
+        self._committed_tasks: List[Task] = []
+        self.days_replanned = 0
+
+    # ============ SETUP ============
+
+    def _working_days(self, start: date) -> List[date]:
+        days, day = [], start
+        # Guard against a calendar with no working days at all
+        for _ in range(self.horizon_days * 7 + 7):
+            if len(days) == self.horizon_days:
+                break
+            if self.capacity.window(day) is not None:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def _predict(self, tasks: List[Task]) -> List[float]:
+        if not tasks:
+            return []
+        if self.drift_analyzer is None:
+            return [float(t.estimated_minutes) for t in tasks]
+        return self.drift_analyzer.predict_many(tasks)["ai_prediction"].tolist()
+
+    def _forecast(self, planned: List[Task]) -> Dict[date, float]:
+        """Fatigue per horizon day for history plus the given planned tasks."""
+        if not self.days or not (self._history or planned):
+            return {}
+        span = (self.days[-1] - self.days[0]).days + 1
+        forecast = DecisionFatigueMonitor.forecast_fatigue(
+            self._history + planned, days=span, start=self.days[0])
+        return dict(zip(forecast["date"], forecast["fatigue_score"]))
+
+    def _budget_for(self, day: date) -> float:
+        fatigue = self.fatigue.get(day, 0.0)
+        excess = max(0.0, fatigue - self.fatigue_threshold)
+        cut = self.max_fatigue_cut * excess / max(100.0 - self.fatigue_threshold, 1e-9)
+        return max(0.0, self.free[day] - self.committed[day]) * (1.0 - cut)
+
+    def plan(
+        self,
+        backlog: List[Dict],
+        all_tasks: Optional[List[Task]] = None,
+        start: Optional[date] = None,
+    ) -> Dict:
+        """
+        Plan the backlog over the horizon.
+
+        Args:
+            backlog: Prioritized entries ({'task', 'priority_score', ...}),
+                     highest priority first
+            all_tasks: Full task list - completed tasks feed the fatigue
+                       forecast, pending ones outside the backlog count as
+                       committed time (and load) on their day
+            start: First day considered (defaults to tomorrow)
+
+        Returns:
+            See result()
+        """
+        start = start or (datetime.now().date() + timedelta(days=1))
+        all_tasks = all_tasks or []
+        self.days = self._working_days(start)
+        backlog_ids = {e['task'].task_id for e in backlog}
+
+        committed_tasks = [
+            t for t in all_tasks
+            if not t.completed and t.task_id not in backlog_ids
+            and t.time_of_day.date() in set(self.days)
+        ]
+        predicted = self._predict([e['task'] for e in backlog] + committed_tasks)
+
+        self.committed = {d: 0.0 for d in self.days}
+        for task, minutes in zip(committed_tasks, predicted[len(backlog):]):
+            self.committed[task.time_of_day.date()] += minutes
+
+        # Budgets can only depend on work whose day is already fixed
+        self._history = [t for t in all_tasks if t.completed]
+        self._committed_tasks = committed_tasks
+        self.fatigue = self._forecast(committed_tasks)
+
+        self.free = {d: self.capacity.available_minutes(d) for d in self.days}
+        self.budget = {d: self._budget_for(d) for d in self.days}
+
+        self._entries = [
+            dict(entry, predicted_minutes=minutes, planned_date=None)
+            for entry, minutes in zip(backlog, predicted[:len(backlog)])
+        ]
+        self._day_of = {}
+        self.days_replanned = 0
+        self._replan_from(0)
+        return self.result()
+
+    # ============ INCREMENTAL RE-PLANNING ============
+
+    def _replan_from(self, k: int) -> None:
+        """First-fit the tasks not placed before day k into days k..N-1."""
+        remaining = {d: self.budget[d] for d in self.days[k:]}
+        for d in self.days[k:]:
+            self.assignments[d] = []
+        self.unplaced = []
+
+        for entry in self._entries:
+            task_id = entry['task'].task_id
+            if 0 <= self._day_of.get(task_id, -1) < k:
+                continue
+            entry['planned_date'] = None
+            self._day_of[task_id] = -1
+            for i in range(k, len(self.days)):
+                day = self.days[i]
+                if entry['predicted_minutes'] <= remaining[day]:
+                    remaining[day] -= entry['predicted_minutes']
+                    entry['planned_date'] = day
+                    self._day_of[task_id] = i
+                    self.assignments[day].append(entry)
+                    break
+            else:
+                self.unplaced.append(entry)
+        self.days_replanned += len(self.days) - k
+
+    def update_day(self, day: date, committed_minutes: Optional[float] = None) -> Dict:
+        """
+        Re-read one day's capacity (e.g. after blocking a meeting) and
+        optionally its committed minutes, then re-plan from that day on.
+        """
+        if day not in self.free:
+            return self.result()
+        self.free[day] = self.capacity.available_minutes(day)
+        if committed_minutes is not None:
+            self.committed[day] = committed_minutes
+        self.budget[day] = self._budget_for(day)
+        self._replan_from(self.days.index(day))
+        return self.result()
+
+    def add(self, entry: Dict) -> Dict:
+        """
+        Insert a backlog entry (by priority) and re-plan from the first day
+        it affects. An entry for a task already in the backlog replaces it.
+        """
+        task_id = entry['task'].task_id
+        if any(e['task'].task_id == task_id for e in self._entries):
+            self.remove(task_id)
+        minutes = self._predict([entry['task']])[0]
+        new = dict(entry, predicted_minutes=minutes, planned_date=None)
+        pos = len(self._entries)
+        for j, other in enumerate(self._entries):
+            if other['priority_score'] < new['priority_score']:
+                pos = j
+                break
+        self._entries.insert(pos, new)
+
+        # Earliest day where the tasks ranked above it leave enough room
+        ahead = {d: 0.0 for d in self.days}
+        for other in self._entries[:pos]:
+            i = self._day_of.get(other['task'].task_id, -1)
+            if i >= 0:
+                ahead[self.days[i]] += other['predicted_minutes']
+        for k, day in enumerate(self.days):
+            if self.budget[day] - ahead[day] >= minutes:
+                self._replan_from(k)
+                break
+        else:
+            self._day_of[new['task'].task_id] = -1
+            self.unplaced.append(new)
+            self.unplaced.sort(key=self._entries.index)
+        return self.result()
+
+    def remove(self, task_id: str) -> Dict:
+        """Drop a backlog entry (done or cancelled) and re-plan from its day."""
+        i = self._day_of.pop(task_id, None)
+        self._entries = [e for e in self._entries if e['task'].task_id != task_id]
+        if i is None:
+            return self.result()
+        if i < 0:
+            self.unplaced = [e for e in self.unplaced if e['task'].task_id != task_id]
+        else:
+            self._replan_from(i)
+        return self.result()
+
+    # ============ OUTPUT ============
+
+    def result(self) -> Dict:
+        """
+        Returns:
+            Dict with:
+              - days: DataFrame (date, free_minutes, committed_minutes,
+                fatigue_score, budget, planned_minutes, planned_tasks);
+                fatigue_score is forecast for the plan as assigned
+              - assignments: {date: [entries]}, each entry carrying
+                planned_date and predicted_minutes
+              - unplaced: entries that fit nowhere in the horizon
+        """
+        # Backlog tasks moved to their planned days (same time of day)
+        moved = [
+            replace(e['task'], time_of_day=datetime.combine(
+                day, e['task'].time_of_day.time()))
+            for day in self.days
+            for e in self.assignments.get(day, [])
+        ]
+        fatigue = self._forecast(self._committed_tasks + moved)
+
+        rows = []
+        for day in self.days:
+            planned = self.assignments.get(day, [])
+            rows.append({
+                "date": day,
+                "free_minutes": self.free[day],
+                "committed_minutes": self.committed[day],
+                "fatigue_score": fatigue.get(day, 0.0),
+                "budget": self.budget[day],
+                "planned_minutes": sum(e['predicted_minutes'] for e in planned),
+                "planned_tasks": len(planned),
+            })
+        return {
+            "days": pd.DataFrame(rows, columns=[
+                "date", "free_minutes", "committed_minutes", "fatigue_score",
+                "budget", "planned_minutes", "planned_tasks"]),
+            "assignments": {d: list(self.assignments.get(d, [])) for d in self.days},
+            "unplaced": list(self.unplaced),
+        }
@@ -1,7 +1,10 @@
 # features/interruption_cost.py
 
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta
+from statistics import NormalDist
+import numpy as np
 import pandas as pd
 from core.models import Task
 
@@ -30,6 +33,7 @@ class InterruptionCostEstimator:
                     "actual": t.actual_minutes,
                     "extra_time": extra,
                     "interruptions": t.interruption_count,
+                    "context_switches": t.context_switches,
                 }
             )
 
@@ -70,3 +74,294 @@ class InterruptionCostEstimator:
             "overall_avg_cost_per_interrupt": float(overall),
             "by_task_type": {k: float(v) for k, v in by_type.items()},
         }
+
+
+class InterruptionCostModel:
+    """
+    Least-squares model of extra time per task type:
+
+        extra_minutes = baseline + cost_per_interrupt * interruptions
+                        + cost_per_switch * context_switches
+
+    The baseline absorbs plain estimation error, so it no longer leaks into
+    the per-interruption cost. Only the sufficient statistics X'X, X'y, y'y
+    and n are kept per task type (plus an overall model), so each completed
+    task is an O(d²) update and coefficients/intervals are a d×d solve at
+    any history size.
+    """
+
+    FEATURES = ["baseline", "cost_per_interrupt", "cost_per_switch"]
+    ALL = "__all__"
+
+    def __init__(self) -> None:
+        d = len(self.FEATURES)
+        self._xtx: Dict[str, np.ndarray] = {}
+        self._xty: Dict[str, np.ndarray] = {}
+        self._yty: Dict[str, float] = {}
+        self._n: Dict[str, int] = {}
+        self._d = d
+
+    def _add(self, key: str, xtx: np.ndarray, xty: np.ndarray,
+             yty: float, n: int) -> None:
+        if key not in self._n:
+            self._xtx[key] = np.zeros((self._d, self._d))
+            self._xty[key] = np.zeros(self._d)
+            self._yty[key] = 0.0
+            self._n[key] = 0
+        self._xtx[key] += xtx
+        self._xty[key] += xty
+        self._yty[key] += yty
+        self._n[key] += n
+
+    def update(self, task: Task) -> None:
+        """Fold one completed task into the statistics."""
+        if not task.completed or task.actual_minutes is None:
+            return
+        if task.estimated_minutes <= 0:
+            return
+
+        x = np.array([1.0, task.interruption_count, task.context_switches])
+        y = task.actual_minutes - task.estimated_minutes
+        xtx, xty = np.outer(x, x), x * y
+        for key in (task.task_type, self.ALL):
+            self._add(key, xtx, xty, y * y, 1)
+
+    def update_many(self, tasks: List[Task]) -> None:
+        """Batch version of update() - one grouped einsum per task type."""
+        df = InterruptionCostEstimator.build_df(tasks)
+        if df.empty:
+            return
+        groups = [(self.ALL, df)] + list(df.groupby("task_type"))
+        for key, g in groups:
+            X = np.column_stack([
+                np.ones(len(g)),
+                g["interruptions"].to_numpy(dtype=float),
+                g["context_switches"].to_numpy(dtype=float),
+            ])
+            y = g["extra_time"].to_numpy(dtype=float)
+            self._add(key, np.einsum("ni,nj->ij", X, X), X.T @ y,
+                      float(y @ y), len(g))
+
+    @classmethod
+    def from_tasks(cls, tasks: List[Task]) -> "InterruptionCostModel":
+        model = cls()
+        model.update_many(tasks)
+        return model
+
+    def coefficients(
+        self, task_type: Optional[str] = None, confidence: float = 0.95
+    ) -> Dict:
+        """
+        Fitted coefficients with standard errors and confidence intervals.
+
+        Args:
+            task_type: Type to report (None = all tasks pooled)
+            confidence: Interval coverage (normal approximation)
+
+        Returns:
+            {} if there are too few tasks, else n, residual_std and per
+            coefficient: value, std_error, ci_low, ci_high
+        """
+        key = task_type or self.ALL
+        n = self._n.get(key, 0)
+        if n <= self._d:
+            return {}
+
+        xtx_inv = np.linalg.pinv(self._xtx[key])
+        beta = xtx_inv @ self._xty[key]
+        rss = max(self._yty[key] - beta @ self._xty[key], 0.0)
+        sigma2 = rss / (n - self._d)
+        std_err = np.sqrt(np.clip(np.diag(xtx_inv) * sigma2, 0, None))
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        result = {"n": n, "residual_std": float(np.sqrt(sigma2))}
+        for name, b, se in zip(self.FEATURES, beta, std_err):
+            result[name] = {
+                "value": float(b),
+                "std_error": float(se),
+                "ci_low": float(b - z * se),
+                "ci_high": float(b + z * se),
+            }
+        return result
+
+    def summary(self) -> Dict:
+        """
+        Returns:
+            - overall: coefficients() for all tasks
+            - by_task_type: coefficients() per type with enough data
+        """
+        by_type = {}
+        for key in self._n:
+            if key == self.ALL:
+                continue
+            coefs = self.coefficients(key)
+            if coefs:
+                by_type[key] = coefs
+        return {"overall": self.coefficients(), "by_task_type": by_type}
+
+
+class InterruptionRateModel:
+    """
+    Forecasts interruptions by weekday × hour × task_type.
+
+    Counts are modelled as Poisson with a Gamma prior per cell (so the
+    predictive distribution is negative binomial). Each cell's prior is
+    centred on its task type's overall rate, itself pulled toward the
+    global rate, with `prior_strength` hours of pseudo-exposure - sparse
+    cells fall back to the type rate instead of 0.
+
+    update() only bumps one cell's event/exposure counters; the 7×24 rate
+    surfaces are recomputed (vectorized) on the next query after a change,
+    and lookups are then O(1) array indexing.
+    """
+
+    DEFAULT_COST_PER_INTERRUPT = 15.0  # minutes, when no cost model is given
+
+    def __init__(
+        self,
+        prior_strength: float = 2.0,
+        cost_model: Optional[InterruptionCostModel] = None,
+    ) -> None:
+        """
+        Args:
+            prior_strength: Pseudo-hours of exposure behind each cell prior
+            cost_model: Supplies minutes lost per interruption by task type
+        """
+        self.prior_strength = prior_strength
+        self.cost_model = cost_model
+        self._events: Dict[str, np.ndarray] = {}
+        self._exposure: Dict[str, np.ndarray] = {}
+        # Cached per type: (posterior alpha, posterior beta), cost/interrupt
+        self._posterior: Dict[str, tuple] = {}
+        self._cost: Dict[str, float] = {}
+        self._dirty = True
+
+    def _cell_arrays(self, task_type: str):
+        if task_type not in self._events:
+            self._events[task_type] = np.zeros((7, 24))
+            self._exposure[task_type] = np.zeros((7, 24))
+        return self._events[task_type], self._exposure[task_type]
+
+    def update(self, task: Task) -> None:
+        """Add one completed task's interruptions and hours worked."""
+        if not task.completed:
+            return
+        minutes = task.actual_minutes or task.estimated_minutes
+        if minutes <= 0:
+            return
+        events, exposure = self._cell_arrays(task.task_type)
+        wd, h = task.day_of_week, task.time_of_day.hour
+        events[wd, h] += task.interruption_count
+        exposure[wd, h] += minutes / 60
+        self._dirty = True
+
+    def update_many(self, tasks: List[Task]) -> None:
+        """Batch update() with one scatter-add per task type."""
+        done = [t for t in tasks if t.completed
+                and (t.actual_minutes or t.estimated_minutes) > 0]
+        if not done:
+            return
+        types = np.array([t.task_type for t in done])
+        wd = np.array([t.day_of_week for t in done])
+        hr = np.array([t.time_of_day.hour for t in done])
+        counts = np.array([t.interruption_count for t in done], dtype=float)
+        hours = np.array(
+            [(t.actual_minutes or t.estimated_minutes) / 60 for t in done])
+        for task_type in np.unique(types):
+            mask = types == task_type
+            events, exposure = self._cell_arrays(str(task_type))
+            np.add.at(events, (wd[mask], hr[mask]), counts[mask])
+            np.add.at(exposure, (wd[mask], hr[mask]), hours[mask])
+        self._dirty = True
+
+    @classmethod
+    def from_tasks(
+        cls, tasks: List[Task], **params
+    ) -> "InterruptionRateModel":
+        model = cls(**params)
+        model.update_many(tasks)
+        return model
+
+    def refresh(self) -> None:
+        """Recompute all posterior surfaces (called lazily by queries)."""
+        k = self.prior_strength
+        total_events = sum(e.sum() for e in self._events.values())
+        total_exposure = sum(x.sum() for x in self._exposure.values())
+        global_rate = total_events / total_exposure if total_exposure else 0.0
+
+        self._posterior = {}
+        self._cost = {}
+        for task_type, events in self._events.items():
+            exposure = self._exposure[task_type]
+            type_rate = (events.sum() + k * global_rate) / (exposure.sum() + k)
+            self._posterior[task_type] = (
+                k * type_rate + events, k + exposure)
+            self._cost[task_type] = self._cost_per_interrupt(task_type)
+        self._global = (k * global_rate, k)
+        self._dirty = False
+
+    def _cost_per_interrupt(self, task_type: str) -> float:
+        if self.cost_model is not None:
+            coefs = (self.cost_model.coefficients(task_type)
+                     or self.cost_model.coefficients())
+            if coefs:
+                return max(0.0, coefs["cost_per_interrupt"]["value"])
+        return self.DEFAULT_COST_PER_INTERRUPT
+
+    def _lookup(self, task_type: str):
+        if self._dirty:
+            self.refresh()
+        if task_type in self._posterior:
+            return self._posterior[task_type], self._cost[task_type]
+        alpha, beta = self._global
+        return (np.full((7, 24), alpha), np.full((7, 24), float(beta))), \
+            self._cost_per_interrupt(task_type)
+
+    def rate(self, weekday: int, hour: int, task_type: str) -> float:
+        """Expected interruptions per hour in a cell."""
+        (alpha, beta), _ = self._lookup(task_type)
+        return float(alpha[weekday, hour] / beta[weekday, hour])
+
+    def slot_cost(
+        self, start: datetime, minutes: float, task_type: str
+    ) -> Dict:
+        """
+        Forecast for a proposed slot (split across the hours it spans).
+
+        Returns:
+            - expected_interruptions
+            - expected_minutes_lost: interruptions × cost per interrupt
+            - p_interrupt_free: negative-binomial P(no interruptions)
+        """
+        (alpha, beta), cost = self._lookup(task_type)
+        expected = 0.0
+        log_p_zero = 0.0
+        cursor, end = start, start + timedelta(minutes=minutes)
+        while cursor < end:
+            next_hour = cursor.replace(minute=0, second=0, microsecond=0) \
+                + timedelta(hours=1)
+            span = (min(end, next_hour) - cursor).total_seconds() / 3600
+            a = alpha[cursor.weekday(), cursor.hour]
+            b = beta[cursor.weekday(), cursor.hour]
+            expected += span * a / b
+            # NB(0) = (b / (b + t)) ** a
+            log_p_zero += a * np.log(b / (b + span))
+            cursor = next_hour
+
+        return {
+            "expected_interruptions": float(expected),
+            "expected_minutes_lost": float(expected * cost),
+            "p_interrupt_free": float(np.exp(log_p_zero)),
+        }
+
+    def cost_surface(self, task_type: str, minutes: float = 60) -> pd.DataFrame:
+        """
+        Expected interruption minutes for a `minutes`-long block starting
+        at each weekday × hour (approximating the block as within one cell).
+
+        Returns:
+            DataFrame indexed by weekday (0=Mon) with one column per hour
+        """
+        (alpha, beta), cost = self._lookup(task_type)
+        surface = alpha / beta * (minutes / 60) * cost
+        return pd.DataFrame(surface, index=range(7), columns=range(24))
@@ -0,0 +1,163 @@
+# features/learned_ranker.py
+
+from __future__ import annotations
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from core.dependencies import TaskDependencyGraph
+from core.models import Task
+from features.task_prioritization import TaskPrioritizer
+
+
+class LearnedPriorityRanker:
+    """
+    Learns priority weights from the order tasks were actually done in.
+
+    Each day of completed tasks is one observed ranking: the tasks, scored
+    as they looked that morning (score_arrays at the day's first task, with
+    the day's average focus as energy), were done in time order. Every
+    earlier/later pair within a day is a training example, and a pairwise
+    logistic regression on score differences finds the weights that best
+    reproduce those choices.
+
+    Urgency keeps its default weight: a completed task's time_of_day is
+    when it was done, so its urgency that morning just restates the order
+    being learned. Only the remaining factors' share is redistributed.
+
+    The result is a plain weights dict for TaskPrioritizer.prioritize_tasks,
+    so ranking is still one dot product per task. With little history the
+    learned weights are shrunk towards DEFAULT_WEIGHTS.
+    """
+
+    FEATURES = ['impact', 'effort', 'energy_alignment']
+
+    def __init__(
+        self,
+        prior_pairs: int = 200,
+        max_pairs_per_day: int = 300,
+        regularization: float = 1.0,
+        random_state: int = 42,
+    ) -> None:
+        """
+        Args:
+            prior_pairs: Pairs of history worth as much as the default weights
+            max_pairs_per_day: Pairs sampled from any one day (caps busy days)
+            regularization: Inverse L2 strength (sklearn's C)
+            random_state: Seed for pair sampling
+        """
+        self.prior_pairs = prior_pairs
+        self.max_pairs_per_day = max_pairs_per_day
+        self.regularization = regularization
+        self.random_state = random_state
+        self.weights: Dict[str, float] = dict(TaskPrioritizer.DEFAULT_WEIGHTS)
+        self.trained = False
+
+    # ============ TRAINING DATA ============
+
+    def _day_features(self, tasks: List[Task]) -> List[np.ndarray]:
+        """
+        Score matrix (tasks x FEATURES) per day, rows in completion order.
+        """
+        days: Dict = {}
+        for task in tasks:
+            if task.completed:
+                days.setdefault(task.time_of_day.date(), []).append(task)
+
+        matrices = []
+        for day in sorted(days):
+            done = sorted(days[day], key=lambda t: t.time_of_day)
+            if len(done) < 2:
+                continue
+            energy = int(np.clip(round(np.mean([t.focus_level for t in done])), 1, 5))
+            scores = TaskPrioritizer.score_arrays(done, energy, done[0].time_of_day)
+            matrices.append(np.column_stack(
+                [scores[f'{name}_score'] for name in self.FEATURES]) / 100)
+        return matrices
+
+    def pairwise_data(self, matrices: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pairwise differences x_earlier - x_later (label 1) and their
+        mirror images (label 0), at most max_pairs_per_day per day.
+        """
+        rng = np.random.default_rng(self.random_state)
+        diffs = []
+        for X in matrices:
+            earlier, later = np.triu_indices(len(X), k=1)
+            if len(earlier) > self.max_pairs_per_day:
+                keep = rng.choice(len(earlier), self.max_pairs_per_day, replace=False)
+                earlier, later = earlier[keep], later[keep]
+            diffs.append(X[earlier] - X[later])
+        if not diffs:
+            return np.empty((0, len(self.FEATURES))), np.empty(0)
+        D = np.vstack(diffs)
+        return (np.vstack([D, -D]),
+                np.concatenate([np.ones(len(D)), np.zeros(len(D))]))
+
+    # ============ FITTING ============
+
+    def train(self, tasks: List[Task]) -> Dict:
+        """
+        Fit weights on completed tasks (earliest 80% of days), and compare
+        pairwise ordering accuracy with DEFAULT_WEIGHTS on the rest.
+        """
+        matrices = self._day_features(tasks)
+        if sum(len(X) for X in matrices) < 20:
+            return {"status": "insufficient_data",
+                    "tasks_needed": 20 - sum(len(X) for X in matrices)}
+
+        split = max(1, int(len(matrices) * 0.8))
+        X_train, y_train = self.pairwise_data(matrices[:split])
+        X_test, y_test = self.pairwise_data(matrices[split:])
+
+        model = LogisticRegression(
+            C=self.regularization, fit_intercept=False, max_iter=1000)
+        model.fit(X_train, y_train)
+        coef = model.coef_[0]
+
+        # Split the learned factors' default share by coefficient
+        default = TaskPrioritizer.DEFAULT_WEIGHTS
+        budget = sum(default[name] for name in self.FEATURES)
+        learned = coef / max(np.abs(coef).sum(), 1e-12) * budget
+
+        # Shrink towards the defaults while history is thin
+        n_pairs = len(X_train) // 2
+        trust = n_pairs / (n_pairs + self.prior_pairs)
+        self.weights = dict(default)
+        for name, value in zip(self.FEATURES, learned):
+            self.weights[name] = float(trust * value + (1 - trust) * default[name])
+        self.trained = True
+
+        return {
+            "status": "success",
+            "weights": dict(self.weights),
+            "pairs": n_pairs,
+            "trust": trust,
+            "accuracy": self.pairwise_accuracy(X_test, y_test, self.weights),
+            "default_accuracy": self.pairwise_accuracy(X_test, y_test, default),
+        }
+
+    @classmethod
+    def pairwise_accuracy(
+        cls, X: np.ndarray, y: np.ndarray, weights: Dict[str, float]
+    ) -> Optional[float]:
+        """Share of pairs whose observed order the weights reproduce."""
+        if len(X) == 0:
+            return None
+        w = np.array([weights[name] for name in cls.FEATURES])
+        return float(np.mean((X @ w > 0) == (y == 1)))
+
+    # ============ RANKING ============
+
+    def rank(
+        self,
+        tasks: List[Task],
+        current_energy: int = 3,
+        current_time: datetime = None,
+        top_k: Optional[int] = None,
+        dependencies: Optional[TaskDependencyGraph] = None,
+    ) -> List[Dict]:
+        """prioritize_tasks with the learned weights."""
+        return TaskPrioritizer.prioritize_tasks(
+            tasks, current_energy, self.weights, current_time,
+            top_k=top_k, dependencies=dependencies)
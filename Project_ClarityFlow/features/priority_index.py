@@ -0,0 +1,211 @@
+# features/priority_index.py
+
+from __future__ import annotations
+from typing import List, Dict, Optional, Set
+from datetime import datetime, timedelta
+import heapq
+from core.models import Task
+from features.task_prioritization import TaskPrioritizer
+
+
+# Hours-before-scheduled-time where calculate_urgency_score can change.
+# Below 8h it's a step function; from 8h to 18h it's linear in time
+# (20 - (h - 8) * 2), and at 18h+ it's flat at 0.
+URGENCY_EDGES = [18, 8, 4, 2, 1, 0.5, 0]
+LINEAR_BAND = (8, 18)
+
+
+def _hour_class(hour: int) -> str:
+    """Energy-alignment time band used by calculate_energy_alignment_score."""
+    if 8 <= hour <= 11:
+        return "peak"
+    if hour >= 16:
+        return "low"
+    return "normal"
+
+
+class PriorityIndex:
+    """
+    Keeps a TaskPrioritizer ranking current as time passes.
+
+    Urgency only changes when a task crosses an urgency boundary (8h, 4h,
+    2h, 1h, 30min, due), so each task's next crossing time is kept in an
+    event heap. A query pops the crossings that have passed and re-scores
+    just those tasks; the ranking itself is a lazy max-heap where stale
+    entries are skipped. Tasks 8-18h out (where urgency falls linearly) and
+    a change of time-of-day band (peak / normal / low energy hours) are the
+    exceptions that force re-scoring.
+
+    top() returns the same entries, in the same order, as
+    TaskPrioritizer.prioritize_tasks on the same tasks at the same time.
+    """
+
+    def __init__(
+        self,
+        tasks: List[Task],
+        current_energy: int = 3,
+        weights: Dict[str, float] = None,
+        now: datetime = None,
+    ) -> None:
+        self.current_energy = current_energy
+        self.weights = weights or TaskPrioritizer.DEFAULT_WEIGHTS
+        self._now = now or datetime.now()
+        self._hour_class = _hour_class(self._now.hour)
+
+        self._tasks: Dict[str, Task] = {}
+        self._order: Dict[str, int] = {}      # tie-break: insertion order
+        self._version: Dict[str, int] = {}
+        self._entry: Dict[str, Dict] = {}
+        self._ranking: List[tuple] = []       # (-priority, order, version, id)
+        self._events: List[tuple] = []        # (time, order, version, id)
+        self._linear: Set[str] = set()
+        self._next_order = 0
+        self.last_rescored = 0
+
+        pending = [t for t in tasks if not t.completed]
+        for task in pending:
+            self._register(task)
+        self._rescore([t.task_id for t in pending])
+
+    # ============ MAINTENANCE ============
+
+    def _register(self, task: Task) -> None:
+        self._tasks[task.task_id] = task
+        self._order[task.task_id] = self._next_order
+        # Versions only ever go up, so entries from a replaced task stay stale
+        self._version.setdefault(task.task_id, 0)
+        self._next_order += 1
+
+    def add(self, task: Task) -> None:
+        """Add (or replace) a task and score it immediately."""
+        if task.task_id in self._tasks:
+            self.remove(task.task_id)
+        if task.completed:
+            return
+        self._register(task)
+        self._rescore([task.task_id])
+
+    def remove(self, task_id: str) -> None:
+        """Drop a task (e.g. completed); its heap entries go stale."""
+        if task_id not in self._tasks:
+            return
+        del self._tasks[task_id]
+        del self._entry[task_id]
+        self._version[task_id] += 1
+        self._linear.discard(task_id)
+
+    def set_energy(self, current_energy: int) -> None:
+        """Energy level affects every task's alignment: full re-score."""
+        if current_energy != self.current_energy:
+            self.current_energy = current_energy
+            self._rescore(list(self._tasks))
+
+    def _rescore(self, task_ids: List[str]) -> None:
+        """Score a batch of tasks at self._now and refresh their entries."""
+        if not task_ids:
+            return
+        tasks = [self._tasks[i] for i in task_ids]
+        scores = TaskPrioritizer.score_arrays(
+            tasks, self.current_energy, self._now)
+        w = self.weights
+        priority = (
+            w['urgency'] * scores['urgency_score'] +
+            w['impact'] * scores['impact_score'] +
+            w['effort'] * scores['effort_score'] +
+            w['energy_alignment'] * scores['energy_alignment_score']
+        )
+        columns = {name: values.tolist() for name, values in scores.items()}
+        hours_until = [
+            (t.time_of_day - self._now).total_seconds() / 3600 for t in tasks]
+
+        for j, (task_id, task) in enumerate(zip(task_ids, tasks)):
+            version = self._version[task_id] + 1
+            self._version[task_id] = version
+            order = self._order[task_id]
+            p = float(priority[j])
+            self._entry[task_id] = {
+                'task': task,
+                'priority_score': p,
+                'urgency_score': columns['urgency_score'][j],
+                'impact_score': columns['impact_score'][j],
+                'effort_score': columns['effort_score'][j],
+                'energy_alignment_score': columns['energy_alignment_score'][j],
+                'strategic_value_score': 50,
+            }
+            heapq.heappush(self._ranking, (-p, order, version, task_id))
+
+            h = hours_until[j]
+            if LINEAR_BAND[0] <= h < LINEAR_BAND[1]:
+                self._linear.add(task_id)
+            else:
+                self._linear.discard(task_id)
+            for edge in URGENCY_EDGES:
+                if h >= edge:
+                    crossing = task.time_of_day - timedelta(hours=edge)
+                    heapq.heappush(
+                        self._events, (crossing, order, version, task_id))
+                    break
+
+        self.last_rescored += len(task_ids)
+        # Compact once stale entries dominate
+        if len(self._ranking) > 4 * max(len(self._tasks), 16):
+            self._ranking = [
+                (-e['priority_score'], self._order[i], self._version[i], i)
+                for i, e in self._entry.items()
+            ]
+            heapq.heapify(self._ranking)
+
+    def advance(self, now: datetime = None) -> int:
+        """
+        Move the clock to `now`, re-scoring only tasks whose urgency bucket
+        changed (plus linear-band tasks). Returns how many were re-scored.
+        """
+        now = now or datetime.now()
+        self._now = now
+        self.last_rescored = 0
+
+        hour_class = _hour_class(now.hour)
+        if hour_class != self._hour_class:
+            self._hour_class = hour_class
+            self._events = []
+            self._rescore(list(self._tasks))
+            return self.last_rescored
+
+        changed = set(self._linear)
+        while self._events and self._events[0][0] < now:
+            _, _, version, task_id = heapq.heappop(self._events)
+            if task_id in self._tasks and self._version[task_id] == version:
+                changed.add(task_id)
+        self._rescore(sorted(changed, key=self._order.get))
+        return self.last_rescored
+
+    # ============ QUERIES ============
+
+    def top(self, k: Optional[int] = None, now: datetime = None) -> List[Dict]:
+        """
+        Current ranking (highest priority first), optionally only the top k.
+        Advances the clock to `now` (default: current time) first.
+        """
+        self.advance(now)
+
+        if k is None or k >= len(self._tasks):
+            live = [
+                (-e['priority_score'], self._order[i], i)
+                for i, e in self._entry.items()
+            ]
+            live.sort()
+            return [self._entry[i] for _, _, i in live]
+
+        result, keep = [], []
+        while self._ranking and len(result) < k:
+            item = heapq.heappop(self._ranking)
+            _, _, version, task_id = item
+            if task_id in self._tasks and self._version[task_id] == version:
+                result.append(self._entry[task_id])
+                keep.append(item)
+        for item in keep:
+            heapq.heappush(self._ranking, item)
+        return result
+
+    def __len__(self) -> int:
+        return len(self._tasks)
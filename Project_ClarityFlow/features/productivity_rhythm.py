@@ -1,11 +1,21 @@
 # features/productivity_rhythm.py
 
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Optional
+from datetime import datetime
+from statistics import NormalDist
+import numpy as np
 import pandas as pd
 from core.models import Task
 
 
+# Dimensions of the rhythm cube (finest grain, every view is a roll-up)
+RHYTHM_CUBE_DIMS = ["weekday", "hour", "complexity_bucket", "task_type"]
+
+# Metrics tracked per cube cell
+RHYTHM_METRICS = ["focus_level", "drift"]
+
+
 class PersonalProductivityRhythmTracker:
     """
     Learns personal productivity rhythm:
@@ -23,6 +33,7 @@ class PersonalProductivityRhythmTracker:
             rows.append(
                 {
                     "date": t.time_of_day.date(),
+                    "timestamp": t.time_of_day,
                     "task_type": t.task_type,
                     "estimated": t.estimated_minutes,
                     "actual": t.actual_minutes,
@@ -31,32 +42,277 @@ class PersonalProductivityRhythmTracker:
                     * 100,
                     "drift_ratio": t.actual_minutes / t.estimated_minutes,
                     "day_of_week": t.time_of_day.strftime("%A"),
+                    "weekday": t.day_of_week,
                     "hour": t.time_of_day.hour,
                     "complexity": t.complexity_score,
+                    # Nearest whole complexity level (1-5)
+                    "complexity_bucket": int(
+                        min(5, max(1, round(t.complexity_score)))
+                    ),
                     "focus_level": t.focus_level,
                 }
             )
         return pd.DataFrame(rows)
 
+    # ============ RHYTHM CUBE ============
+
+    @staticmethod
+    def build_rhythm_cube(
+        tasks: List[Task], history: Optional[pd.DataFrame] = None
+    ) -> pd.DataFrame:
+        """
+        Aggregate history into a weekday × hour × complexity_bucket × task_type
+        cube in a single groupby.
+
+        Each cell holds count, sum and sum of squares for focus and drift
+        (so any roll-up can be re-derived exactly), plus mean and variance.
+
+        Args:
+            tasks: Task list (ignored if history is given)
+            history: Pre-built frame from build_history_dataframe (optional)
+
+        Returns:
+            DataFrame with one row per non-empty cell
+        """
+        df = history
+        if df is None:
+            df = PersonalProductivityRhythmTracker.build_history_dataframe(tasks)
+        if df.empty:
+            return pd.DataFrame()
+
+        df = df.assign(
+            focus_level_sq=df["focus_level"] ** 2,
+            drift_sq=df["drift"] ** 2,
+        )
+        cube = df.groupby(RHYTHM_CUBE_DIMS, observed=True).agg(
+            count=("focus_level", "size"),
+            focus_level_sum=("focus_level", "sum"),
+            focus_level_sumsq=("focus_level_sq", "sum"),
+            drift_sum=("drift", "sum"),
+            drift_sumsq=("drift_sq", "sum"),
+        )
+        return PersonalProductivityRhythmTracker._finalize_cube(cube.reset_index())
+
+    @staticmethod
+    def slice_rhythm_cube(cube: pd.DataFrame, dims: List[str]) -> pd.DataFrame:
+        """
+        Roll the cube up onto a subset of its dimensions.
+
+        Means and variances are recomputed from the pooled sums, so the
+        result is identical to grouping the raw history by `dims`.
+        """
+        if cube.empty:
+            return pd.DataFrame()
+
+        sum_cols = ["count"] + [
+            f"{m}_{s}" for m in RHYTHM_METRICS for s in ("sum", "sumsq")
+        ]
+        rolled = cube.groupby(dims, observed=True)[sum_cols].sum().reset_index()
+        return PersonalProductivityRhythmTracker._finalize_cube(rolled)
+
+    @staticmethod
+    def _finalize_cube(cube: pd.DataFrame) -> pd.DataFrame:
+        """Derive mean and sample variance columns from the sufficient stats."""
+        n = cube["count"].to_numpy(dtype=float)
+        for m in RHYTHM_METRICS:
+            s = cube[f"{m}_sum"].to_numpy(dtype=float)
+            ss = cube[f"{m}_sumsq"].to_numpy(dtype=float)
+            mean = s / n
+            with np.errstate(divide="ignore", invalid="ignore"):
+                var = np.where(n > 1, (ss - s * mean) / (n - 1), np.nan)
+            cube[m] = mean
+            cube[f"{m}_var"] = np.clip(var, 0, None)
+        return cube
+
+    # ============ SHRINKAGE ESTIMATES ============
+
+    @staticmethod
+    def shrink_rhythm_cube(
+        cube: pd.DataFrame,
+        dims: List[str] = ("weekday", "hour"),
+        levels: Optional[Dict[str, List]] = None,
+        prior_strength: Optional[float] = None,
+        credible: float = 0.9,
+    ) -> pd.DataFrame:
+        """
+        Hierarchical (cell → hour → global) shrinkage of focus and drift.
+
+        Each hour's mean is pulled toward the global mean, and each cell's
+        mean toward its hour's posterior, by a pseudo-count k:
+            posterior = (sum + k * parent) / (count + k)
+        k is estimated per level by method of moments (within- vs between-
+        group variance) unless prior_strength is given. Sparse cells fall
+        back smoothly to their hour, and empty cells get the hour posterior.
+
+        Args:
+            cube: Output of build_rhythm_cube
+            dims: Cell dimensions; must include "hour"
+            levels: Values to cover per dimension (defaults to observed ones),
+                    e.g. {"hour": range(8, 19)} to get a full grid
+            prior_strength: Fixed pseudo-count k for both levels (optional)
+            credible: Width of the credible interval (0-1)
+
+        Returns:
+            DataFrame with dims, count, and per metric: raw mean,
+            <metric>_post, <metric>_lo, <metric>_hi
+        """
+        if cube.empty:
+            return pd.DataFrame()
+        dims = list(dims)
+        if "hour" not in dims:
+            raise ValueError("dims must include 'hour'")
+
+        P = PersonalProductivityRhythmTracker
+        levels = levels or {}
+        cells = P.slice_rhythm_cube(cube, dims)
+        grid = pd.MultiIndex.from_product(
+            [list(levels.get(d, sorted(cells[d].unique()))) for d in dims],
+            names=dims,
+        )
+        if len(dims) == 1:
+            grid = grid.get_level_values(0)
+        cells = cells.set_index(dims).reindex(grid)
+        cells["count"] = cells["count"].fillna(0)
+        hours = P.slice_rhythm_cube(cube, ["hour"]).set_index("hour")
+        cell_hours = grid.get_level_values("hour")
+
+        z = NormalDist().inv_cdf(0.5 + credible / 2)
+        n_c = cells["count"].to_numpy(dtype=float)
+        n_h = hours["count"].to_numpy(dtype=float)
+        out = cells[["count"]].copy()
+
+        for m in RHYTHM_METRICS:
+            s_h = hours[f"{m}_sum"].to_numpy(dtype=float)
+            ss_h = hours[f"{m}_sumsq"].to_numpy(dtype=float)
+            n_all = n_h.sum()
+            mu_g = s_h.sum() / n_all
+            var_g = (
+                (ss_h.sum() - s_h.sum() * mu_g) / (n_all - 1)
+                if n_all > 1 else 1.0
+            )
+
+            # Level 1: hour pulled toward global
+            var_h = P._pooled_within_var(n_h, s_h, ss_h, var_g)
+            k_h = prior_strength
+            if k_h is None:
+                k_h = P._prior_strength(n_h, s_h, np.full_like(n_h, mu_g), var_h)
+            mu_h = (s_h + k_h * mu_g) / (n_h + k_h)
+            # Posterior variance carries the parent's uncertainty down
+            mu_g_var = var_g / n_all
+            mu_h_var = (
+                var_h / (n_h + k_h) + (k_h / (n_h + k_h)) ** 2 * mu_g_var
+            )
+
+            if dims == ["hour"]:
+                s_c = np.nan_to_num(cells[f"{m}_sum"].to_numpy(dtype=float))
+                post = (s_c + k_h * mu_g) / (n_c + k_h)
+                post_var = (
+                    var_h / (n_c + k_h) + (k_h / (n_c + k_h)) ** 2 * mu_g_var
+                )
+            else:
+                # Level 2: cell pulled toward its hour's posterior
+                parent = (
+                    pd.Series(mu_h, index=hours.index)
+                    .reindex(cell_hours)
+                    .fillna(mu_g)
+                    .to_numpy()
+                )
+                parent_var = (
+                    pd.Series(mu_h_var, index=hours.index)
+                    .reindex(cell_hours)
+                    .fillna(var_g)
+                    .to_numpy()
+                )
+                s_c = np.nan_to_num(cells[f"{m}_sum"].to_numpy(dtype=float))
+                ss_c = np.nan_to_num(cells[f"{m}_sumsq"].to_numpy(dtype=float))
+                var_c = P._pooled_within_var(n_c, s_c, ss_c, var_h)
+                k_c = prior_strength
+                if k_c is None:
+                    k_c = P._prior_strength(n_c, s_c, parent, var_c)
+                post = (s_c + k_c * parent) / (n_c + k_c)
+                post_var = (
+                    var_c / (n_c + k_c)
+                    + (k_c / (n_c + k_c)) ** 2 * parent_var
+                )
+
+            half_width = z * np.sqrt(post_var)
+            out[m] = cells[m]
+            out[f"{m}_post"] = post
+            out[f"{m}_lo"] = post - half_width
+            out[f"{m}_hi"] = post + half_width
+
+        return out.reset_index()
+
+    @staticmethod
+    def _pooled_within_var(
+        n: np.ndarray, s: np.ndarray, ss: np.ndarray, fallback: float
+    ) -> float:
+        """Pooled within-group variance from per-group sufficient stats."""
+        used = n > 0
+        dof = n[used].sum() - used.sum()
+        if dof <= 0:
+            return fallback
+        within = (ss[used] - s[used] ** 2 / n[used]).sum() / dof
+        return max(within, 1e-9)
+
+    @staticmethod
+    def _prior_strength(
+        n: np.ndarray, s: np.ndarray, parent: np.ndarray, within_var: float
+    ) -> float:
+        """
+        Method-of-moments pseudo-count k = within_var / between_var.
+        E[n_g * (mean_g - parent)^2] = n_g * tau^2 + within_var.
+        """
+        used = n > 0
+        total = n[used].sum()
+        if total == 0:
+            return 1.0
+        mean = s[used] / n[used]
+        spread = (n[used] * (mean - parent[used]) ** 2).sum() / total
+        # Floor keeps k bounded (<= 1000) when groups look identical
+        tau2 = max(spread - within_var * used.sum() / total, within_var * 1e-3)
+        return within_var / tau2
+
     @staticmethod
-    def summarize_rhythm(tasks: List[Task]) -> Dict:
+    def summarize_rhythm(
+        tasks: List[Task],
+        cube: Optional[pd.DataFrame] = None,
+        half_life_days: Optional[float] = None,
+        shrink: bool = False,
+    ) -> Dict:
         """
         Returns:
             - hourly_focus: mean focus per hour
             - hourly_drift: mean drift per hour
             - best_hour: hour with highest focus
             - worst_hour: hour with worst drift
+
+        If half_life_days is given, recent tasks count more: a task's weight
+        halves every half_life_days (see DecayedRhythmProfile).
+
+        If shrink is set, best/worst hours are picked on shrunk hour means
+        (see shrink_rhythm_cube), so one lucky task can't win an hour.
         """
-        df = PersonalProductivityRhythmTracker.build_history_dataframe(tasks)
-        if df.empty:
+        if half_life_days is not None:
+            return DecayedRhythmProfile.from_tasks(
+                tasks, half_life_days).summary()
+
+        if cube is None:
+            cube = PersonalProductivityRhythmTracker.build_rhythm_cube(tasks)
+        if cube.empty:
             return {}
 
-        hourly = df.groupby("hour").agg(
-            {"focus_level": "mean", "drift": "mean"}
-        ).reset_index()
+        hourly = PersonalProductivityRhythmTracker.slice_rhythm_cube(
+            cube, ["hour"])
+
+        rank_focus, rank_drift = hourly["focus_level"], hourly["drift"]
+        if shrink:
+            shrunk = PersonalProductivityRhythmTracker.shrink_rhythm_cube(
+                cube, ["hour"])
+            rank_focus, rank_drift = shrunk["focus_level_post"], shrunk["drift_post"]
 
-        best_focus_row = hourly.loc[hourly["focus_level"].idxmax()]
-        worst_drift_row = hourly.loc[hourly["drift"].idxmax()]
+        best_focus_row = hourly.loc[rank_focus.idxmax()]
+        worst_drift_row = hourly.loc[rank_drift.idxmax()]
 
         return {
             "hourly_focus": hourly[["hour", "focus_level"]],
@@ -66,3 +322,122 @@ class PersonalProductivityRhythmTracker:
             "worst_drift_hour": int(worst_drift_row["hour"]),
             "worst_drift_value": float(worst_drift_row["drift"]),
         }
+
+
+class DecayedRhythmProfile:
+    """
+    Recency-weighted focus/drift profile by hour of day.
+
+    Each task's weight halves every `half_life_days`. Sums are kept decayed
+    to the time of the latest event, so adding a task only rescales the 24
+    hourly cells by the elapsed-time factor - no pass over older history.
+    """
+
+    HOURS = 24
+
+    def __init__(self, half_life_days: float = 30.0) -> None:
+        if half_life_days <= 0:
+            raise ValueError("half_life_days must be positive")
+        self.half_life_days = half_life_days
+        self.weight = np.zeros(self.HOURS)
+        self.focus_sum = np.zeros(self.HOURS)
+        self.drift_sum = np.zeros(self.HOURS)
+        self.last_time: datetime | None = None
+
+    def _decay(self, elapsed_days):
+        return 0.5 ** (elapsed_days / self.half_life_days)
+
+    def add_event(
+        self, when: datetime, hour: int, focus_level: float, drift: float
+    ) -> None:
+        """Fold one observation into the profile in O(1)."""
+        if self.last_time is None:
+            self.last_time = when
+
+        elapsed = (when - self.last_time).total_seconds() / 86400
+        if elapsed > 0:
+            # Newer event: age everything we have, new event gets weight 1
+            factor = self._decay(elapsed)
+            self.weight *= factor
+            self.focus_sum *= factor
+            self.drift_sum *= factor
+            self.last_time = when
+            w = 1.0
+        else:
+            # Late/out-of-order event: discount it to the current reference
+            w = self._decay(-elapsed)
+
+        self.weight[hour] += w
+        self.focus_sum[hour] += w * focus_level
+        self.drift_sum[hour] += w * drift
+
+    def update(self, task: Task) -> None:
+        """Add a completed task (ignored if not completed)."""
+        if not task.completed or task.actual_minutes is None:
+            return
+        drift = (
+            (task.actual_minutes - task.estimated_minutes)
+            / task.estimated_minutes
+            * 100
+        )
+        self.add_event(
+            task.time_of_day, task.time_of_day.hour, task.focus_level, drift)
+
+    @classmethod
+    def from_history(
+        cls, history: pd.DataFrame, half_life_days: float = 30.0
+    ) -> "DecayedRhythmProfile":
+        """
+        Build a profile from a build_history_dataframe frame in one
+        vectorized pass. Equivalent to calling add_event per row.
+        """
+        profile = cls(half_life_days)
+        if history.empty:
+            return profile
+
+        ts = pd.to_datetime(history["timestamp"])
+        ref = ts.max()
+        age_days = (ref - ts).dt.total_seconds().to_numpy() / 86400
+        w = profile._decay(age_days)
+        hours = history["hour"].to_numpy(dtype=int)
+
+        profile.weight = np.bincount(hours, w, cls.HOURS)
+        profile.focus_sum = np.bincount(
+            hours, w * history["focus_level"].to_numpy(dtype=float), cls.HOURS)
+        profile.drift_sum = np.bincount(
+            hours, w * history["drift"].to_numpy(dtype=float), cls.HOURS)
+        profile.last_time = ref.to_pydatetime()
+        return profile
+
+    @classmethod
+    def from_tasks(
+        cls, tasks: List[Task], half_life_days: float = 30.0
+    ) -> "DecayedRhythmProfile":
+        history = PersonalProductivityRhythmTracker.build_history_dataframe(
+            tasks)
+        return cls.from_history(history, half_life_days)
+
+    def summary(self) -> Dict:
+        """
+        Same keys as summarize_rhythm, using decayed means.
+
+        Means are ratios of decayed sums, so they don't depend on when the
+        summary is read - no further rescaling needed.
+        """
+        seen = np.flatnonzero(self.weight > 0)
+        if seen.size == 0:
+            return {}
+
+        focus = self.focus_sum[seen] / self.weight[seen]
+        drift = self.drift_sum[seen] / self.weight[seen]
+        best = int(np.argmax(focus))
+        worst = int(np.argmax(drift))
+
+        return {
+            "hourly_focus": pd.DataFrame({"hour": seen, "focus_level": focus}),
+            "hourly_drift": pd.DataFrame({"hour": seen, "drift": drift}),
+            "best_focus_hour": int(seen[best]),
+            "best_focus_value": float(focus[best]),
+            "worst_drift_hour": int(seen[worst]),
+            "worst_drift_value": float(drift[worst]),
+        }
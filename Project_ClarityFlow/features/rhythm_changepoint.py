@@ -0,0 +1,180 @@
+# features/rhythm_changepoint.py
+
+from __future__ import annotations
+from typing import List, Dict, Optional
+from datetime import date
+import math
+import pandas as pd
+from core.models import Task
+from features.productivity_rhythm import PersonalProductivityRhythmTracker
+
+
+class _MetricCusum:
+    """Self-starting two-sided CUSUM for one daily metric (O(1) state)."""
+
+    def __init__(self, warmup: int, k: float, h: float) -> None:
+        self.warmup = warmup
+        self.k = k
+        self.h = h
+        self.reset()
+
+    def reset(self) -> None:
+        # Welford running mean/variance for the current regime
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.s_hi = 0.0
+        self.s_lo = 0.0
+        self.onset_hi: Optional[date] = None
+        self.onset_lo: Optional[date] = None
+
+    def _absorb(self, value: float) -> None:
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def update(self, day: date, value: float) -> Optional[Dict]:
+        if self.n < self.warmup:
+            # Too few days to trust the baseline yet
+            self._absorb(value)
+            return None
+
+        sd = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+        z = (value - self.mean) / max(sd, 1e-6)
+
+        # Remember where each side last started climbing (change onset)
+        if self.s_hi == 0:
+            self.onset_hi = day
+        if self.s_lo == 0:
+            self.onset_lo = day
+        self.s_hi = max(0.0, self.s_hi + z - self.k)
+        self.s_lo = max(0.0, self.s_lo - z - self.k)
+
+        if self.s_hi > self.h or self.s_lo > self.h:
+            up = self.s_hi > self.h
+            event = {
+                "detected_on": day,
+                "onset": self.onset_hi if up else self.onset_lo,
+                "direction": "up" if up else "down",
+                "baseline_mean": self.mean,
+            }
+            self.reset()
+            return event
+
+        # In-control days keep refining the baseline (self-starting CUSUM)
+        self._absorb(value)
+        return None
+
+
+class RhythmChangePointDetector:
+    """
+    Streaming change-point detection on daily focus and drift.
+
+    Uses a self-starting CUSUM per metric: each day is standardized against
+    the running mean/std of the current regime (no alarms during the first
+    `warmup` days), and deviations accumulate until they cross `threshold`.
+    After a detection the baseline is re-learned from scratch.
+
+    Memory is bounded: only the running stats per metric plus the partial
+    sums of the current day are kept, whatever the history length.
+    Tasks must arrive in chronological order.
+    """
+
+    METRICS = ["focus_level", "drift"]
+
+    def __init__(
+        self, warmup: int = 14, slack: float = 0.5, threshold: float = 8.0
+    ) -> None:
+        """
+        Args:
+            warmup: Days used to learn each regime's baseline
+            slack: CUSUM allowance k (in std devs) - ignores small wobbles
+            threshold: CUSUM decision limit h (in std devs)
+        """
+        self._cusums = {
+            m: _MetricCusum(warmup, slack, threshold) for m in self.METRICS
+        }
+        self._day: Optional[date] = None
+        self._count = 0
+        self._sums = {m: 0.0 for m in self.METRICS}
+        self.change_points: List[Dict] = []
+
+    def update_day(self, day: date, focus_level: float, drift: float) -> List[Dict]:
+        """Feed one day's mean focus and drift; returns new change points."""
+        events = []
+        for metric, value in (("focus_level", focus_level), ("drift", drift)):
+            event = self._cusums[metric].update(day, value)
+            if event is not None:
+                event["metric"] = metric
+                events.append(event)
+        self.change_points.extend(events)
+        return events
+
+    def add_task(self, task: Task) -> List[Dict]:
+        """
+        Feed one completed task. The day is closed (and scored) when the
+        first task of a later date arrives.
+        """
+        if not task.completed or task.actual_minutes is None:
+            return []
+
+        day = task.time_of_day.date()
+        events = []
+        if self._day is not None and day != self._day:
+            events = self.flush()
+        self._day = day
+        self._count += 1
+        self._sums["focus_level"] += task.focus_level
+        self._sums["drift"] += (
+            (task.actual_minutes - task.estimated_minutes)
+            / task.estimated_minutes
+            * 100
+        )
+        return events
+
+    def flush(self) -> List[Dict]:
+        """Score the day currently being accumulated."""
+        if self._day is None or self._count == 0:
+            return []
+        events = self.update_day(
+            self._day,
+            self._sums["focus_level"] / self._count,
+            self._sums["drift"] / self._count,
+        )
+        self._count = 0
+        self._sums = {m: 0.0 for m in self.METRICS}
+        return events
+
+    @staticmethod
+    def daily_series(history: pd.DataFrame) -> pd.DataFrame:
+        """Daily mean focus and drift from a build_history_dataframe frame."""
+        if history.empty:
+            return pd.DataFrame()
+        return (
+            history.groupby("date")[RhythmChangePointDetector.METRICS]
+            .mean()
+            .sort_index()
+            .reset_index()
+        )
+
+    @staticmethod
+    def detect(tasks: List[Task], **params) -> pd.DataFrame:
+        """
+        Run the detector over a full task history in one pass.
+
+        Returns:
+            DataFrame of change points (metric, onset, detected_on,
+            direction, baseline_mean)
+        """
+        history = PersonalProductivityRhythmTracker.build_history_dataframe(tasks)
+        daily = RhythmChangePointDetector.daily_series(history)
+        detector = RhythmChangePointDetector(**params)
+        for day, focus, drift in daily.itertuples(index=False):
+            detector.update_day(day, focus, drift)
+
+        return pd.DataFrame(
+            detector.change_points,
+            columns=["metric", "onset", "detected_on",
+                     "direction", "baseline_mean"],
+        )
@@ -1,8 +1,12 @@
 # features/schedule_realism.py
 
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Optional
+from datetime import date
+import numpy as np
+import pandas as pd
 from core.models import Task
+from core.capacity import CapacityModel
 from features.execution_drift import ExecutionDriftAnalyzer
 
 
@@ -11,12 +15,30 @@ class ScheduleRealismScorer:
 
     @staticmethod
     def calculate_score(
-        schedule: List[Task], drift_analyzer: ExecutionDriftAnalyzer
+        schedule: List[Task],
+        drift_analyzer: ExecutionDriftAnalyzer,
+        capacity: Optional[CapacityModel] = None,
     ) -> Dict:
+        """
+        Args:
+            schedule: The day's tasks
+            drift_analyzer: Trained analyzer (or None for the neutral default)
+            capacity: Calendar capacity (defaults to a fixed 8-hour day)
+        """
         if not schedule:
             return {"score": 100.0, "components": {}, "level": "high"}
 
         available_time = 8 * 60  # 8 hours in minutes
+        if capacity is not None:
+            available_time = capacity.available_minutes(
+                schedule[0].time_of_day.date())
+        if available_time <= 0:
+            # No free time at all: anything planned is unrealistic
+            return {
+                "score": 0.0,
+                "components": {"time_budget": 0.0, "historical_fit": 0.0, "buffer": 0.0},
+                "level": "low",
+            }
         total_estimated = sum(t.estimated_minutes for t in schedule)
 
         # 1. Time budget score (how close to capacity your plan is)
@@ -67,3 +89,406 @@ class ScheduleRealismScorer:
             },
             "level": level,
         }
+
+    @staticmethod
+    def _vector_components(
+        total_estimated: np.ndarray,
+        predicted_total: Optional[np.ndarray],
+        available: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        """
+        calculate_score's three components and weighted score, elementwise
+        over arrays of (total estimated, predicted total, available) minutes.
+        predicted_total=None means no model (neutral historical score).
+        """
+        total_estimated = np.asarray(total_estimated, dtype=float)
+        available = np.broadcast_to(
+            np.asarray(available, dtype=float), total_estimated.shape)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # 1. Time budget score
+            utilization = total_estimated / available
+            time_budget = np.select(
+                [utilization <= 0.75, utilization <= 0.9, utilization <= 1.0],
+                [100.0, 80.0, 50.0],
+                np.maximum(0, 30 - (utilization - 1.0) * 50),
+            )
+
+            # 2. Historical accuracy score
+            if predicted_total is not None:
+                actual_utilization = np.asarray(predicted_total) / available
+                historical = np.maximum(
+                    0, 100 - (actual_utilization - 0.9) * 200)
+            else:
+                historical = np.full(total_estimated.shape, 70.0)
+
+            # 3. Buffer score
+            buffer_pct = (available - total_estimated) / available
+            buffer = np.select(
+                [buffer_pct >= 0.25, buffer_pct >= 0.15, buffer_pct >= 0.05],
+                [100.0, 80.0, 50.0],
+                20.0,
+            )
+
+        score = 0.40 * time_budget + 0.35 * historical + 0.25 * buffer
+        return {
+            "utilization": utilization,
+            "time_budget": time_budget,
+            "historical_fit": historical,
+            "buffer": buffer,
+            # No free time at all scores 0, as in calculate_score
+            "score": np.where(available > 0, score, 0.0),
+        }
+
+    @staticmethod
+    def score_days(
+        schedule: List[Task],
+        drift_analyzer: ExecutionDriftAnalyzer,
+        capacities: Optional[Dict[date, float]] = None,
+        default_capacity: float = 8 * 60,
+        capacity: Optional[CapacityModel] = None,
+    ) -> Dict:
+        """
+        Score many days at once (week/sprint planning).
+
+        Same components and weights as calculate_score, computed with array
+        ops over per-day totals and a single batched drift prediction.
+
+        Args:
+            schedule: Tasks spanning any number of days (grouped by date)
+            drift_analyzer: Trained analyzer (or None for the neutral default)
+            capacities: Available minutes per date (days listed here with no
+                        tasks are included as empty days)
+            default_capacity: Minutes for dates missing from capacities
+            capacity: Calendar model used for dates missing from capacities
+                      (instead of default_capacity)
+
+        Returns:
+            - days: DataFrame, one row per date with totals, components,
+                    score and level
+            - rollup: dict of horizon-level aggregates
+        """
+        capacities = capacities or {}
+        if not schedule and not capacities:
+            return {"days": pd.DataFrame(), "rollup": {}}
+
+        df = pd.DataFrame(
+            {
+                "date": [t.time_of_day.date() for t in schedule],
+                "estimated": [t.estimated_minutes for t in schedule],
+            }
+        )
+        use_model = drift_analyzer is not None and drift_analyzer.model is not None
+        df["predicted"] = (
+            drift_analyzer.predict_many(schedule)["ai_prediction"].to_numpy()
+            if use_model else np.nan
+        )
+
+        dates = sorted(set(df["date"]) | set(capacities))
+        daily = (
+            df.groupby("date")
+            .agg(
+                tasks=("estimated", "size"),
+                total_estimated=("estimated", "sum"),
+                predicted_total=("predicted", "sum"),
+            )
+            .reindex(dates)
+            .fillna({"tasks": 0, "total_estimated": 0.0, "predicted_total": 0.0})
+        )
+        daily.index.name = "date"
+        per_day = pd.Series(capacities, dtype=float).reindex(daily.index)
+        if capacity is not None:
+            per_day = per_day.fillna(
+                pd.Series(
+                    [capacity.available_minutes(d) for d in daily.index],
+                    index=daily.index,
+                )
+            )
+        available = per_day.fillna(default_capacity).to_numpy()
+        total = daily["total_estimated"].to_numpy(dtype=float)
+
+        predicted = (
+            daily["predicted_total"].to_numpy(dtype=float) if use_model else None)
+        components = ScheduleRealismScorer._vector_components(
+            total, predicted, available)
+        utilization = components["utilization"]
+        time_budget = components["time_budget"]
+        historical = components["historical_fit"]
+        buffer = components["buffer"]
+        # Empty days score like an empty calculate_score() schedule
+        overall = np.where(
+            daily["tasks"].to_numpy() == 0, 100.0, components["score"])
+
+        daily["tasks"] = daily["tasks"].astype(int)
+        daily["capacity"] = available
+        daily["utilization"] = utilization
+        daily["time_budget"] = time_budget.round(1)
+        daily["historical_fit"] = np.round(historical, 1)
+        daily["buffer"] = buffer.round(1)
+        daily["score"] = overall.round(1)
+        daily["level"] = np.select(
+            [overall > 75, overall > 50], ["high", "medium"], "low")
+        if not use_model:
+            daily = daily.drop(columns="predicted_total")
+        daily = daily.reset_index()
+
+        total_capacity = float(available.sum())
+        rollup = {
+            "days": len(daily),
+            "avg_score": round(float(overall.mean()), 1),
+            "min_score": round(float(overall.min()), 1),
+            "worst_day": daily.loc[int(np.argmin(overall)), "date"],
+            "days_by_level": daily["level"].value_counts().to_dict(),
+            "total_estimated": float(total.sum()),
+            "total_capacity": total_capacity,
+            "utilization": (
+                float(total.sum()) / total_capacity if total_capacity else None
+            ),
+        }
+        if use_model:
+            rollup["predicted_total"] = float(daily["predicted_total"].sum())
+
+        return {"days": daily, "rollup": rollup}
+
+    @staticmethod
+    def simulate(
+        schedule: List[Task],
+        drift_analyzer: ExecutionDriftAnalyzer,
+        n: int = 10000,
+        available_minutes: float = 8 * 60,
+        type_correlation: float = 0.0,
+        default_residual_sd: float = 0.25,
+        seed: Optional[int] = None,
+    ) -> Dict:
+        """
+        Monte Carlo completion probability for a day's schedule.
+
+        Each draw samples every task's drift ratio as predicted ratio plus a
+        residual bootstrapped from the drift model's held-out errors (or a
+        normal with default_residual_sd when no residuals are available).
+        With type_correlation > 0, tasks of the same type share part of
+        their residual in each draw (e.g. a bad coding day hits every coding
+        task). All draws are computed as one (n × tasks) array.
+
+        Args:
+            schedule: Tasks for the day
+            drift_analyzer: Analyzer providing predictions/residuals
+            n: Number of simulated days
+            available_minutes: Capacity to finish within
+            type_correlation: 0-1 share of residual variance common to a type
+            default_residual_sd: Residual std dev when the model has none
+            seed: RNG seed for reproducible results
+
+        Returns:
+            - completion_probability: P(total time <= available_minutes)
+            - expected_overtime: mean minutes past capacity (0 if on time)
+            - expected_total, p50_total, p90_total: total minutes
+            - tasks: DataFrame with per-task p50/p90 minutes and
+                     bottleneck_risk (P(day overruns and this task has the
+                     largest overrun))
+        """
+        if not schedule:
+            return {
+                "completion_probability": 1.0,
+                "expected_overtime": 0.0,
+                "expected_total": 0.0,
+                "p50_total": 0.0,
+                "p90_total": 0.0,
+                "tasks": pd.DataFrame(),
+            }
+
+        rng = np.random.default_rng(seed)
+        m = len(schedule)
+        estimated = np.array([t.estimated_minutes for t in schedule], dtype=float)
+        if drift_analyzer is not None:
+            ratio = drift_analyzer.predict_many(schedule)["drift_ratio"].to_numpy()
+            residuals = drift_analyzer.residuals
+        else:
+            ratio = np.full(m, 1.2)
+            residuals = None
+
+        def draw(size):
+            if residuals is not None and len(residuals) >= 5:
+                centered = residuals - residuals.mean()
+                return centered[rng.integers(0, len(centered), size=size)]
+            return rng.normal(0.0, default_residual_sd, size=size)
+
+        noise = draw((n, m))
+        if type_correlation > 0:
+            types, type_idx = np.unique(
+                [t.task_type for t in schedule], return_inverse=True)
+            shared = draw((n, len(types)))[:, type_idx]
+            noise = (
+                np.sqrt(type_correlation) * shared
+                + np.sqrt(1 - type_correlation) * noise
+            )
+
+        durations = estimated * np.maximum(ratio + noise, 0.05)
+        totals = durations.sum(axis=1)
+        overtime = np.maximum(totals - available_minutes, 0.0)
+
+        # Bottleneck: the task with the largest overrun in a late draw
+        late = overtime > 0
+        worst = np.argmax(durations - estimated, axis=1)
+        bottleneck = np.bincount(worst[late], minlength=m) / n
+
+        p50, p90 = np.percentile(durations, [50, 90], axis=0)
+        tasks = pd.DataFrame(
+            {
+                "task_id": [t.task_id for t in schedule],
+                "task_type": [t.task_type for t in schedule],
+                "estimated": estimated,
+                "p50_minutes": p50.round(1),
+                "p90_minutes": p90.round(1),
+                "bottleneck_risk": bottleneck,
+            }
+        )
+
+        return {
+            "completion_probability": float(np.mean(~late)),
+            "expected_overtime": round(float(overtime.mean()), 1),
+            "expected_total": round(float(totals.mean()), 1),
+            "p50_total": round(float(np.percentile(totals, 50)), 1),
+            "p90_total": round(float(np.percentile(totals, 90)), 1),
+            "tasks": tasks,
+        }
+
+    @staticmethod
+    def _day_totals(
+        schedule: List[Task],
+        drift_analyzer: ExecutionDriftAnalyzer,
+        capacity: Optional[CapacityModel],
+    ):
+        """Per-task estimates/predictions plus the day's available minutes."""
+        estimated = np.array([t.estimated_minutes for t in schedule], dtype=float)
+        predicted = None
+        if drift_analyzer and drift_analyzer.model is not None:
+            predicted = drift_analyzer.predict_many(
+                schedule)["ai_prediction"].to_numpy()
+        available = 8 * 60
+        if capacity is not None:
+            available = capacity.available_minutes(
+                schedule[0].time_of_day.date())
+        return estimated, predicted, available
+
+    @staticmethod
+    def removal_impact(
+        schedule: List[Task],
+        drift_analyzer: ExecutionDriftAnalyzer,
+        capacity: Optional[CapacityModel] = None,
+    ) -> pd.DataFrame:
+        """
+        Score change from removing (or deferring to another day) each task.
+
+        The score only depends on the day's estimated and predicted totals,
+        so every "schedule minus task i" is scored at once from the totals
+        minus that task - one batched prediction instead of n re-scorings.
+
+        Returns:
+            DataFrame (one row per task, best removal first) with task_id,
+            estimated, predicted, score_without and score_delta
+        """
+        if not schedule:
+            return pd.DataFrame()
+
+        estimated, predicted, available = ScheduleRealismScorer._day_totals(
+            schedule, drift_analyzer, capacity)
+        base = float(ScheduleRealismScorer._vector_components(
+            estimated.sum(),
+            None if predicted is None else predicted.sum(),
+            available,
+        )["score"])
+
+        without = ScheduleRealismScorer._vector_components(
+            estimated.sum() - estimated,
+            None if predicted is None else predicted.sum() - predicted,
+            available,
+        )["score"]
+        if len(schedule) == 1:
+            without = np.array([100.0])  # empty schedule
+
+        impact = pd.DataFrame(
+            {
+                "task_id": [t.task_id for t in schedule],
+                "task_type": [t.task_type for t in schedule],
+                "estimated": estimated,
+                "predicted": predicted if predicted is not None else np.nan,
+                "score_without": without.round(1),
+                "score_delta": (without - base).round(1),
+            }
+        )
+        return impact.sort_values("score_delta", ascending=False).reset_index(
+            drop=True)
+
+    @staticmethod
+    def auto_trim(
+        schedule: List[Task],
+        drift_analyzer: ExecutionDriftAnalyzer,
+        target_score: float = 75.0,
+        capacity: Optional[CapacityModel] = None,
+        keep: Optional[List[str]] = None,
+    ) -> Dict:
+        """
+        Fewest deferrals that bring the day up to target_score.
+
+        Removing a task never lowers the score, so for k deferrals the best
+        choice is the k "heaviest" tasks. Candidates are ranked by estimated
+        minutes, by predicted minutes, and by a blend of both; prefix sums
+        score every k for each ranking in one array op, and the smallest k
+        reaching the target wins (exact without a drift model).
+
+        Args:
+            schedule: The day's tasks
+            drift_analyzer: Trained analyzer (or None)
+            target_score: Score to reach
+            capacity: Calendar capacity (defaults to a fixed 8-hour day)
+            keep: task_ids that must not be deferred
+
+        Returns:
+            - defer: tasks to move off the day
+            - keep: remaining tasks
+            - score: resulting realism score
+            - reached: whether target_score was reached
+        """
+        if not schedule:
+            return {"defer": [], "keep": [], "score": 100.0, "reached": True}
+
+        estimated, predicted, available = ScheduleRealismScorer._day_totals(
+            schedule, drift_analyzer, capacity)
+        keep_ids = set(keep or [])
+        movable = np.array([t.task_id not in keep_ids for t in schedule])
+        idx = np.flatnonzero(movable)
+
+        keys = [estimated[idx]]
+        if predicted is not None:
+            keys += [predicted[idx], estimated[idx] + predicted[idx]]
+
+        best_k, best_order, best_score = None, None, None
+        for key in keys:
+            order = idx[np.argsort(-key, kind="stable")]
+            removed_est = np.concatenate([[0.0], np.cumsum(estimated[order])])
+            removed_pred = None
+            if predicted is not None:
+                removed_pred = np.concatenate(
+                    [[0.0], np.cumsum(predicted[order])])
+            scores = ScheduleRealismScorer._vector_components(
+                estimated.sum() - removed_est,
+                None if predicted is None else predicted.sum() - removed_pred,
+                available,
+            )["score"]
+            if len(order) == len(schedule):
+                scores[-1] = 100.0  # everything deferred = empty day
+
+            hits = np.flatnonzero(scores >= target_score)
+            k = int(hits[0]) if hits.size else len(order)
+            if best_k is None or k < best_k or (
+                    k == best_k and scores[k] > best_score):
+                best_k, best_order, best_score = k, order, float(scores[k])
+
+        deferred = set(best_order[:best_k].tolist())
+        return {
+            "defer": [t for i, t in enumerate(schedule) if i in deferred],
+            "keep": [t for i, t in enumerate(schedule) if i not in deferred],
+            "score": round(best_score, 1),
+            "reached": best_score >= target_score,
+        }
@@ -1,17 +1,18 @@
 # features/task_prioritization.py
 
 from __future__ import annotations
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from core.models import Task
-import os
-
-try:
-    from openai import OpenAI
-    _OPENAI_CLIENT: Optional[OpenAI] = OpenAI(
-        api_key=os.getenv("OPENAI_API_KEY"))
-except Exception:
-    _OPENAI_CLIENT = None
+from core.background import submit
+from core.capacity import CapacityModel
+from core.dependencies import TaskDependencyGraph
+from core.llm_cache import LLMResponseCache, fingerprint, get_default_cache
+from core.llm_batch import ChunkedLLMScorer
+from core.llm_client import get_llm_client
+import numpy as np
+import json
 
 
 class TaskPrioritizer:
@@ -36,6 +37,17 @@ class TaskPrioritizer:
         'strategic_value': 0.15,   # Long-term importance
     }
 
+    # Bonus for finishing work that unblocks other tasks. Applied on top of
+    # DEFAULT_WEIGHTS only when a dependency graph is given (override with
+    # a 'dependency' entry in custom weights)
+    DEPENDENCY_WEIGHT = 0.10
+
+    AI_MODEL = "gpt-4o-mini"
+    STRATEGIC_SYSTEM_PROMPT = (
+        "You are an expert executive coach helping managers prioritize "
+        "effectively. You understand the difference between urgent and important."
+    )
+
     @staticmethod
     def calculate_urgency_score(task: Task, current_time: datetime = None) -> float:
         """
@@ -177,21 +189,123 @@ class TaskPrioritizer:
 
         return base_score
 
+    @staticmethod
+    def score_arrays(
+        tasks: List[Task],
+        current_energy: int = 3,
+        current_time: datetime = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized urgency / impact / effort / energy-alignment scores
+
+        Same step functions as the calculate_*_score methods, expressed as
+        np.select over column arrays so a whole backlog is scored at once.
+
+        Returns:
+            Dict of arrays (one entry per task, same order as tasks)
+        """
+        if current_time is None:
+            current_time = datetime.now()
+        current_hour = current_time.hour
+
+        time_until = np.array(
+            [(t.time_of_day - current_time).total_seconds() for t in tasks],
+            dtype=float) / 3600
+        estimated = np.array([t.estimated_minutes for t in tasks], dtype=float)
+        complexity = np.array([t.complexity_score for t in tasks], dtype=float)
+        task_types = np.array([t.task_type for t in tasks], dtype=object)
+
+        # Urgency: step curve on hours until scheduled time
+        urgency = np.select(
+            [time_until < 0, time_until < 0.5, time_until < 1,
+             time_until < 2, time_until < 4, time_until < 8],
+            [100, 95, 85, 70, 50, 30],
+            np.maximum(0, 20 - (time_until - 8) * 2),
+        )
+
+        # Impact: complexity (0-60) + capped duration (0-40)
+        impact = (complexity / 5.0) * 60 + np.minimum(estimated / 120, 1.0) * 40
+
+        # Effort: inverse step curve on duration
+        effort = np.select(
+            [estimated <= 15, estimated <= 30, estimated <= 60, estimated <= 90],
+            [100, 80, 60, 40],
+            np.maximum(0, 40 - (estimated - 90) / 10),
+        )
+
+        # Energy alignment (mirrors calculate_energy_alignment_score)
+        if current_energy >= 4:
+            energy = np.select([complexity >= 4, complexity >= 3], [100, 80], 60)
+        elif current_energy >= 3:
+            energy = np.select(
+                [(complexity >= 2.5) & (complexity <= 3.5), complexity >= 4],
+                [100, 70], 80)
+        else:
+            energy = np.select([complexity <= 2, complexity <= 3], [100, 70], 40)
+
+        if 8 <= current_hour <= 11:
+            energy = np.where(complexity >= 3, np.minimum(100, energy + 10), energy)
+        elif current_hour >= 16:
+            energy = np.where(complexity <= 2, np.minimum(100, energy + 10), energy)
+
+        if current_energy >= 4:
+            boost = np.isin(task_types, ['deep_work', 'coding'])
+        elif current_energy <= 2:
+            boost = np.isin(task_types, ['admin', 'communication'])
+        else:
+            boost = np.zeros(len(tasks), dtype=bool)
+        energy = np.where(boost, np.minimum(100, energy + 10), energy)
+
+        return {
+            'urgency_score': urgency.astype(float),
+            'impact_score': impact,
+            'effort_score': effort.astype(float),
+            'energy_alignment_score': energy.astype(float),
+        }
+
+    @staticmethod
+    def _top_k_order(priority: np.ndarray, top_k: Optional[int]) -> np.ndarray:
+        """
+        Indices by priority (highest first, ties in input order), limited
+        to the top k via argpartition when k is smaller than the list.
+        """
+        n = len(priority)
+        if top_k is None or top_k >= n:
+            return np.argsort(-priority, kind='stable')
+        if top_k <= 0:
+            return np.empty(0, dtype=int)
+
+        candidates = np.argpartition(-priority, top_k - 1)[:top_k]
+        threshold = priority[candidates].min()
+        # Resolve ties at the cut like a stable full sort would
+        above = np.flatnonzero(priority > threshold)
+        tied = np.flatnonzero(priority == threshold)[:top_k - len(above)]
+        chosen = np.concatenate([above, tied])
+        return chosen[np.argsort(-priority[chosen], kind='stable')]
+
     @staticmethod
     def prioritize_tasks(
         tasks: List[Task],
         current_energy: int = 3,
         weights: Dict[str, float] = None,
-        current_time: datetime = None
+        current_time: datetime = None,
+        top_k: Optional[int] = None,
+        dependencies: Optional[TaskDependencyGraph] = None,
     ) -> List[Dict]:
         """
         Prioritize a list of tasks using multiple factors
 
+        With a dependency graph, tasks that unblock others get a bonus (see
+        calculate_dependency_scores) and tasks still waiting on a pending
+        blocker are ranked after every task that can start now.
+
         Args:
             tasks: List of incomplete tasks
             current_energy: Current energy level (1-5)
             weights: Custom priority weights (optional)
             current_time: Current datetime (defaults to now)
+            top_k: Only return the k highest-priority tasks (optional)
+            dependencies: Task dependency graph (optional)
 
         Returns:
             List of tasks with priority scores, sorted by priority (highest first)
@@ -202,47 +316,80 @@ class TaskPrioritizer:
         if current_time is None:
             current_time = datetime.now()
 
-        current_hour = current_time.hour
+        pending = [task for task in tasks if not task.completed]
+        if not pending:
+            return []
 
-        # Calculate scores for each task
-        scored_tasks = []
+        scores = TaskPrioritizer.score_arrays(
+            pending, current_energy, current_time)
 
-        for task in tasks:
-            if task.completed:
-                continue
+        # Weighted priority score (summed in the same order as the scalar
+        # formula so results match it exactly)
+        priority = (
+            weights['urgency'] * scores['urgency_score'] +
+            weights['impact'] * scores['impact_score'] +
+            weights['effort'] * scores['effort_score'] +
+            weights['energy_alignment'] * scores['energy_alignment_score']
+        )
 
-            urgency = TaskPrioritizer.calculate_urgency_score(
-                task, current_time)
-            impact = TaskPrioritizer.calculate_impact_score(task)
-            effort = TaskPrioritizer.calculate_effort_score(task)
-            energy_alignment = TaskPrioritizer.calculate_energy_alignment_score(
-                task, current_energy, current_hour
-            )
+        # Note: strategic_value will be added by AI if available
 
-            # Calculate weighted priority score
-            priority_score = (
-                weights['urgency'] * urgency +
-                weights['impact'] * impact +
-                weights['effort'] * effort +
-                weights['energy_alignment'] * energy_alignment
-            )
+        if dependencies is None:
+            order = TaskPrioritizer._top_k_order(priority, top_k)
+        else:
+            dependency = TaskPrioritizer.calculate_dependency_scores(
+                pending, dependencies)
+            priority = priority + weights.get(
+                'dependency', TaskPrioritizer.DEPENDENCY_WEIGHT
+            ) * dependency['dependency_score']
+            # Startable tasks first; stable, so ties keep input order
+            order = np.lexsort(
+                (-priority, dependency['blocked_by'] > 0))[:top_k]
+
+        columns = {name: values.tolist() for name, values in scores.items()}
+        priority_list = priority.tolist()
+
+        result = [
+            {
+                'task': pending[i],
+                'priority_score': priority_list[i],
+                'urgency_score': columns['urgency_score'][i],
+                'impact_score': columns['impact_score'][i],
+                'effort_score': columns['effort_score'][i],
+                'energy_alignment_score': columns['energy_alignment_score'][i],
+                'strategic_value_score': 50,  # Default neutral score
+            }
+            for i in order.tolist()
+        ]
 
-            # Note: strategic_value will be added by AI if available
+        if dependencies is not None:
+            extra = {name: values.tolist() for name, values in dependency.items()}
+            for entry, i in zip(result, order.tolist()):
+                entry['dependency_score'] = extra['dependency_score'][i]
+                entry['unblocks_count'] = extra['unblocks'][i]
+                entry['blocked_by_count'] = extra['blocked_by'][i]
 
-            scored_tasks.append({
-                'task': task,
-                'priority_score': priority_score,
-                'urgency_score': urgency,
-                'impact_score': impact,
-                'effort_score': effort,
-                'energy_alignment_score': energy_alignment,
-                'strategic_value_score': 50,  # Default neutral score
-            })
+        return result
 
-        # Sort by priority (highest first)
-        scored_tasks.sort(key=lambda x: x['priority_score'], reverse=True)
+    @staticmethod
+    def calculate_dependency_scores(
+        tasks: List[Task],
+        dependencies: TaskDependencyGraph,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score how much finishing each task frees up
 
-        return scored_tasks
+        A task "unblocks" a dependent when it is that dependent's last
+        pending blocker. The score saturates: unblocking 1 task = 50,
+        2 = 75, 3 = 87.5, ... Linear in the number of edges.
+
+        Returns:
+            Dict of arrays aligned with tasks: dependency_score (0-100),
+            unblocks, dependents, blocked_by
+        """
+        counts = dependencies.unblock_counts(tasks)
+        counts['dependency_score'] = 100 * (1 - 0.5 ** counts['unblocks'])
+        return counts
 
     @staticmethod
     def get_prioritization_insights(prioritized_tasks: List[Dict]) -> Dict:
@@ -333,6 +480,9 @@ class TaskPrioritizer:
         prioritized_tasks: List[Dict],
         context: str = "",
         manager_goals: str = "",
+        cache: Optional[LLMResponseCache] = None,
+        concurrency: int = 4,
+        weights: Optional[Dict[str, float]] = None,
     ) -> List[Dict]:
         """
         Use OpenAI to add strategic value scoring to prioritized tasks
@@ -340,43 +490,211 @@ class TaskPrioritizer:
         This helps identify tasks that are strategically important even if
         they're not urgent (e.g., long-term planning, team development)
 
+        Strategic scores are memoized per task (keyed by the task's
+        description plus context and goals), so the prompt only carries new
+        or changed tasks, with a few already-scored tasks as a calibration
+        reference. Responses are cached on disk and identical concurrent
+        requests share one API call.
+
         Args:
             prioritized_tasks: Already scored tasks from prioritize_tasks()
             context: Additional context about current situation
             manager_goals: Manager's current goals/priorities
+            cache: Response cache (defaults to the shared disk cache)
+            concurrency: Max concurrent requests when the delta is chunked
+            weights: Priority weights used for the ranking (defaults to
+                     DEFAULT_WEIGHTS)
 
         Returns:
             Same task list with updated strategic_value_score and priority_score
         """
-        if _OPENAI_CLIENT is None:
-            # No OpenAI - return as-is
+        if not get_llm_client().available():
+            # No OpenAI (or endpoint unhealthy) - return as-is
             return prioritized_tasks
 
         if not prioritized_tasks:
             return []
 
+        if cache is None:
+            cache = get_default_cache()
+
+        # A task's strategic value depends on what it is and on the manager's
+        # context/goals - not on its (time-varying) priority score
+        task_keys = [
+            fingerprint("strategic_score", TaskPrioritizer.AI_MODEL,
+                        context, manager_goals,
+                        TaskPrioritizer._describe_task(t['task']))
+            for t in prioritized_tasks
+        ]
+        known: Dict[int, Dict] = {}
+        for i, key in enumerate(task_keys):
+            hit = cache.get(key)
+            if hit is not None:
+                known[i] = hit
+
+        delta = [i for i in range(len(prioritized_tasks)) if i not in known]
+        if delta:
+            try:
+                fresh = TaskPrioritizer._score_delta(
+                    prioritized_tasks, delta, known, context, manager_goals,
+                    cache, concurrency=concurrency)
+                for i, entry in fresh.items():
+                    known[i] = entry
+                    cache.set(task_keys[i], entry)
+            except Exception as e:
+                print(f"[TaskPrioritizer] AI enhancement failed: {e}")
+                # Keep whatever scores were already cached
+
+        # Update tasks with strategic scores
+        if weights is None:
+            weights = TaskPrioritizer.DEFAULT_WEIGHTS
+
+        for idx, entry in known.items():
+            strategic_score = entry['strategic_value_score']
+
+            # Update strategic value
+            prioritized_tasks[idx]['strategic_value_score'] = strategic_score
+            prioritized_tasks[idx]['ai_reasoning'] = entry.get('reasoning', '')
+
+            # Recalculate priority score with strategic value
+            t = prioritized_tasks[idx]
+            new_priority = (
+                weights['urgency'] * t['urgency_score'] +
+                weights['impact'] * t['impact_score'] +
+                weights['effort'] * t['effort_score'] +
+                weights['energy_alignment'] * t['energy_alignment_score'] +
+                weights['strategic_value'] * strategic_score
+            )
+            if 'dependency_score' in t:
+                new_priority += weights.get(
+                    'dependency', TaskPrioritizer.DEPENDENCY_WEIGHT
+                ) * t['dependency_score']
+
+            prioritized_tasks[idx]['priority_score'] = new_priority
+
+        # Re-sort with new scores
+        if known:
+            # Tasks waiting on a blocker stay behind startable ones
+            prioritized_tasks.sort(
+                key=lambda x: (x.get('blocked_by_count', 0) > 0, -x['priority_score']))
+
+        return prioritized_tasks
+
+    @staticmethod
+    def _describe_task(task: Task) -> Dict:
+        """Stable description of a task as shown to the model."""
+        return {
+            'type': task.task_type,
+            'estimated_minutes': task.estimated_minutes,
+            'complexity': task.complexity_score,
+            'scheduled': task.time_of_day.strftime('%I:%M %p'),
+        }
+
+    @staticmethod
+    def _score_delta(
+        prioritized_tasks: List[Dict],
+        delta: List[int],
+        known: Dict[int, Dict],
+        context: str,
+        manager_goals: str,
+        cache: LLMResponseCache,
+        reference_size: int = 12,
+        concurrency: int = 4,
+    ) -> Dict[int, Dict]:
+        """
+        Ask the model to score only the tasks at positions `delta`.
+
+        Small deltas go out as one request; larger ones are split into
+        token-budgeted chunks scored concurrently (see ChunkedLLMScorer).
+
+        Returns:
+            {position: {"strategic_value_score", "reasoning"}}
+        """
         # Prepare task descriptions for AI
         task_descriptions = []
-        for i, t in enumerate(prioritized_tasks):
-            task = t['task']
-            task_descriptions.append({
-                'index': i,
-                'type': task.task_type,
-                'estimated_minutes': task.estimated_minutes,
-                'complexity': task.complexity_score,
-                'scheduled': task.time_of_day.strftime('%I:%M %p'),
-                'current_priority_score': round(t['priority_score'], 1)
-            })
+        for i in delta:
+            t = prioritized_tasks[i]
+            description = TaskPrioritizer._describe_task(t['task'])
+            description['current_priority_score'] = round(t['priority_score'], 1)
+            task_descriptions.append(description)
+
+        # Already-scored tasks, spread across the score range, so new scores
+        # are calibrated against the old ones
+        reference = []
+        if known:
+            ranked = sorted(known.items(),
+                            key=lambda kv: kv[1]['strategic_value_score'])
+            step = max(1, len(ranked) // reference_size)
+            for i, entry in ranked[::step][:reference_size]:
+                task = prioritized_tasks[i]['task']
+                reference.append({
+                    'type': task.task_type,
+                    'complexity': round(task.complexity_score, 1),
+                    'estimated_minutes': task.estimated_minutes,
+                    'strategic_value_score': entry['strategic_value_score'],
+                })
+
+        scorer = ChunkedLLMScorer(
+            build_prompt=lambda items: TaskPrioritizer._strategic_prompt(
+                items, reference, context, manager_goals),
+            system_prompt=TaskPrioritizer.STRATEGIC_SYSTEM_PROMPT,
+            model=TaskPrioritizer.AI_MODEL,
+            concurrency=concurrency,
+            cache=cache,
+            cache_tag=fingerprint(reference, context, manager_goals),
+            validate_row=TaskPrioritizer._valid_strategic_row,
+        )
 
-        # Create prompt for OpenAI
-        prompt = f"""You are helping a manager prioritize their tasks for today.
+        if len(scorer.chunks(task_descriptions)) == 1:
+            indexed = [dict(d, index=j) for j, d in enumerate(task_descriptions)]
+            prompt = TaskPrioritizer._strategic_prompt(
+                indexed, reference, context, manager_goals)
+            key = fingerprint(
+                "ai_enhance_prioritization", TaskPrioritizer.AI_MODEL,
+                indexed, reference, context, manager_goals)
+            ai_scores = cache.get_or_compute(
+                key, lambda: TaskPrioritizer._request_strategic_scores(prompt),
+                validate=lambda rows: TaskPrioritizer._complete_strategic_reply(
+                    rows, len(delta)))
+            rows = {
+                j: row for j, row in ChunkedLLMScorer._merge(
+                    ai_scores, list(range(len(delta)))).items()
+                if TaskPrioritizer._valid_strategic_row(row)
+            }
+        else:
+            rows = scorer.score(task_descriptions)
+
+        return {
+            delta[j]: {
+                'strategic_value_score': row['strategic_value_score'],
+                'reasoning': row.get('reasoning', ''),
+            }
+            for j, row in rows.items()
+        }
+
+    @staticmethod
+    def _strategic_prompt(
+        task_descriptions: List[Dict],
+        reference: List[Dict],
+        context: str,
+        manager_goals: str,
+    ) -> str:
+        """User prompt asking for strategic scores of the given tasks."""
+        reference_block = ""
+        if reference:
+            reference_block = f"""
+Already-scored tasks (for calibration only - do not score these again):
+{reference}
+"""
+
+        return f"""You are helping a manager prioritize their tasks for today.
 
 Current Context:
 {context if context else "Regular work day"}
 
 Manager's Current Goals:
 {manager_goals if manager_goals else "General productivity and task completion"}
-
+{reference_block}
 Tasks to prioritize:
 {task_descriptions}
 
@@ -397,61 +715,47 @@ Respond ONLY with a JSON array like:
 ]
 """
 
-        try:
-            response = _OPENAI_CLIENT.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert executive coach helping managers prioritize effectively. You understand the difference between urgent and important."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
-
-            # Parse response
-            import json
-            ai_scores = json.loads(response.choices[0].message.content)
-
-            # Update tasks with strategic scores
-            weights = TaskPrioritizer.DEFAULT_WEIGHTS
+    @staticmethod
+    def _valid_strategic_row(row: Dict) -> bool:
+        """A reply row with a usable 0-100 strategic score."""
+        score = row.get('strategic_value_score')
+        return (isinstance(score, (int, float)) and not isinstance(score, bool)
+                and 0 <= score <= 100)
 
-            for score_data in ai_scores:
-                idx = score_data['index']
-                strategic_score = score_data['strategic_value_score']
-                reasoning = score_data.get('reasoning', '')
-
-                if 0 <= idx < len(prioritized_tasks):
-                    # Update strategic value
-                    prioritized_tasks[idx]['strategic_value_score'] = strategic_score
-                    prioritized_tasks[idx]['ai_reasoning'] = reasoning
-
-                    # Recalculate priority score with strategic value
-                    t = prioritized_tasks[idx]
-                    new_priority = (
-                        weights['urgency'] * t['urgency_score'] +
-                        weights['impact'] * t['impact_score'] +
-                        weights['effort'] * t['effort_score'] +
-                        weights['energy_alignment'] * t['energy_alignment_score'] +
-                        weights['strategic_value'] * strategic_score
-                    )
-
-                    prioritized_tasks[idx]['priority_score'] = new_priority
-
-            # Re-sort with new scores
-            prioritized_tasks.sort(
-                key=lambda x: x['priority_score'], reverse=True)
+    @staticmethod
+    def _complete_strategic_reply(rows: List[Dict], n: int) -> bool:
+        """True if every one of the n tasks got a valid score (safe to cache)."""
+        valid = ChunkedLLMScorer._merge(rows, list(range(n)))
+        return len(valid) == n and all(
+            TaskPrioritizer._valid_strategic_row(row) for row in valid.values())
 
-        except Exception as e:
-            print(f"[TaskPrioritizer] AI enhancement failed: {e}")
-            # Return original prioritization if AI fails
+    @staticmethod
+    def _request_strategic_scores(prompt: str) -> List[Dict]:
+        """
+        Ask the model for strategic scores and parse its JSON reply.
 
-        return prioritized_tasks
+        Raises:
+            ValueError: the reply isn't a JSON array (nothing gets cached)
+        """
+        response = get_llm_client().chat(
+            model=TaskPrioritizer.AI_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": TaskPrioritizer.STRATEGIC_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.7,
+            max_tokens=1000
+        )
+        rows = json.loads(response.choices[0].message.content)
+        if not isinstance(rows, list) or not rows:
+            raise ValueError("Expected a non-empty JSON array of scores")
+        return rows
 
     @staticmethod
     def get_ai_prioritization_explanation(
@@ -468,12 +772,17 @@ Respond ONLY with a JSON array like:
         Returns:
             Human-readable explanation of why tasks are ordered this way
         """
-        if _OPENAI_CLIENT is None:
+        llm = get_llm_client()
+        if not llm.configured():
             return "AI explanation unavailable (no OpenAI API key configured)"
 
         if not prioritized_tasks:
             return "No tasks to prioritize"
 
+        if not llm.available():
+            # Endpoint unhealthy - skip straight to the rule-based text
+            return TaskPrioritizer._heuristic_explanation(prioritized_tasks)
+
         # Take top N tasks
         top_tasks = prioritized_tasks[:top_n]
 
@@ -508,7 +817,7 @@ Keep it concise, practical, and motivating. Use a friendly, coaching tone.
 """
 
         try:
-            response = _OPENAI_CLIENT.chat.completions.create(
+            response = llm.chat(
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -528,19 +837,163 @@ Keep it concise, practical, and motivating. Use a friendly, coaching tone.
 
         except Exception as e:
             print(f"[TaskPrioritizer] AI explanation failed: {e}")
-            return f"Prioritized by urgency ({top_tasks[0]['urgency_score']:.0f}%), impact, and energy alignment."
+            return TaskPrioritizer._heuristic_explanation(top_tasks)
+
+    @staticmethod
+    def _heuristic_explanation(prioritized_tasks: List[Dict]) -> str:
+        if not prioritized_tasks:
+            return "No tasks to prioritize"
+        return f"Prioritized by urgency ({prioritized_tasks[0]['urgency_score']:.0f}%), impact, and energy alignment."
+
+    # ============ NON-BLOCKING VARIANTS ============
+
+    @staticmethod
+    def ai_enhance_prioritization_async(
+        prioritized_tasks: List[Dict],
+        context: str = "",
+        manager_goals: str = "",
+        cache: Optional[LLMResponseCache] = None,
+        concurrency: int = 4,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> Tuple[List[Dict], Future]:
+        """
+        Non-blocking ai_enhance_prioritization
+
+        Returns:
+            (heuristic ranking to show right away,
+             Future resolving to the AI-enhanced ranking)
+
+        The background call works on copies of the task entries, so the
+        returned heuristic list is never modified behind the caller's back.
+        """
+        snapshot = [dict(t) for t in prioritized_tasks]
+        future = submit(
+            TaskPrioritizer.ai_enhance_prioritization,
+            snapshot, context, manager_goals, cache, concurrency, weights,
+        )
+        return prioritized_tasks, future
+
+    @staticmethod
+    def get_ai_prioritization_explanation_async(
+        prioritized_tasks: List[Dict],
+        top_n: int = 5
+    ) -> Tuple[str, Future]:
+        """
+        Non-blocking get_ai_prioritization_explanation
+
+        Returns:
+            (rule-based explanation to show right away,
+             Future resolving to the AI explanation)
+        """
+        heuristic = TaskPrioritizer._heuristic_explanation(prioritized_tasks)
+        if not get_llm_client().available():
+            # Nothing better is coming - keep the rule-based text
+            future = Future()
+            future.set_result(heuristic)
+            return heuristic, future
+
+        snapshot = [dict(t) for t in prioritized_tasks]
+        future = submit(
+            TaskPrioritizer.get_ai_prioritization_explanation, snapshot, top_n)
+        return heuristic, future
+
+    @staticmethod
+    def _select_knapsack(
+        minutes: np.ndarray,
+        values: np.ndarray,
+        capacity: float,
+        max_cells: int = 5_000_000,
+    ) -> Tuple[np.ndarray, int]:
+        """
+        0/1 knapsack: which tasks maximize total priority within capacity.
+
+        Dynamic programming over capacity in whole minutes (durations are
+        rounded up, so any selection really fits). When the
+        table would exceed `max_cells`, durations are bucketed into coarser
+        g-minute units instead - still feasible, near-optimal, and bounded
+        in time and memory for very large backlogs.
+
+        Returns:
+            (boolean mask of selected tasks, granularity g in minutes;
+             g == 1 means the result is exact)
+        """
+        n = len(minutes)
+        chosen = np.zeros(n, dtype=bool)
+        if n == 0 or capacity <= 0:
+            return chosen, 1
+
+        values = np.asarray(values, dtype=float)
+        minutes = np.ceil(np.asarray(minutes, dtype=float)).astype(int)
+
+        # At most capacity // w tasks of duration w can ever fit, and the
+        # best of them are always at least as good - drop the rest. Typical
+        # backlogs use a handful of durations, so this shrinks huge lists.
+        order = np.lexsort((-values, minutes))
+        sorted_minutes = minutes[order]
+        group_start = np.searchsorted(sorted_minutes, sorted_minutes, side="left")
+        rank = np.arange(n) - group_start
+        limit = np.where(
+            sorted_minutes > 0,
+            np.floor(capacity / np.maximum(sorted_minutes, 1)),
+            n,
+        )
+        candidates = np.sort(order[rank < limit])
+
+        m = len(candidates)
+        granularity = max(1, int(np.ceil(m * (capacity + 1) / max_cells)))
+        weights = np.ceil(minutes[candidates] / granularity).astype(int)
+        values = values[candidates]
+        cap = int(np.floor(capacity / granularity))
+
+        # best[c] = best total priority using at most c units
+        best = np.zeros(cap + 1)
+        take = np.zeros((m, cap + 1), dtype=bool)
+        for i in range(m):
+            w = weights[i]
+            if w > cap:
+                continue
+            if w == 0:
+                take[i] = True
+                best += values[i]
+                continue
+            candidate = best[:cap + 1 - w] + values[i]
+            better = candidate > best[w:]
+            take[i, w:] = better
+            best[w:] = np.where(better, candidate, best[w:])
+
+        c = cap
+        for i in range(m - 1, -1, -1):
+            if take[i, c]:
+                chosen[candidates[i]] = True
+                c -= weights[i]
+        return chosen, granularity
 
     @staticmethod
     def suggest_schedule_reordering(
         prioritized_tasks: List[Dict],
-        available_hours: float = 8.0
+        available_hours: float = 8.0,
+        capacity: Optional[CapacityModel] = None,
+        start_time: datetime = None,
+        method: str = "knapsack",
+        max_cells: int = 5_000_000,
     ) -> Dict:
         """
         Suggest optimal time slots for prioritized tasks
 
+        With method="knapsack" (default) the set of tasks done today is the
+        one with the highest total priority that fits the available minutes
+        (see _select_knapsack), so a big task no longer crowds out several
+        smaller ones worth more together. Selected tasks are then placed in
+        priority order. method="greedy" keeps the old first-fit packing.
+
         Args:
             prioritized_tasks: Already prioritized tasks
-            available_hours: Hours available today
+            available_hours: Hours available today (ignored with capacity)
+            capacity: Calendar capacity - tasks go into free slots between
+                      blocked time instead of back-to-back
+            start_time: Earliest start (defaults to now)
+            method: "knapsack" or "greedy"
+            max_cells: DP table size above which the knapsack is approximated
 
         Returns:
             Suggested schedule with time blocks
@@ -548,41 +1001,90 @@ Keep it concise, practical, and motivating. Use a friendly, coaching tone.
         if not prioritized_tasks:
             return {'schedule': [], 'overflow': []}
 
-        current_time = datetime.now()
-        schedule = []
+        current_time = start_time or datetime.now()
         total_minutes = 0
         available_minutes = available_hours * 60
 
-        for t_data in prioritized_tasks:
+        booked = None
+        if capacity is not None:
+            # Place into a copy so the caller's calendar isn't modified
+            booked = capacity.copy()
+            window = capacity.window(current_time.date())
+            day_end = window[1] if window else current_time
+            available_minutes = capacity.free_minutes(current_time, day_end)
+
+        n = len(prioritized_tasks)
+        granularity = 1
+        if method == "knapsack":
+            selected, granularity = TaskPrioritizer._select_knapsack(
+                np.array([t['task'].estimated_minutes for t in prioritized_tasks]),
+                np.array([t['priority_score'] for t in prioritized_tasks]),
+                available_minutes,
+                max_cells,
+            )
+            # Selected tasks first, then a first-fit pass over the rest to
+            # use any slack (rounding, or gaps the selection left unusable)
+            order = [i for i in range(n) if selected[i]] + \
+                [i for i in range(n) if not selected[i]]
+        elif method == "greedy":
+            order = list(range(n))
+        else:
+            raise ValueError(f"Unknown scheduling method: {method}")
+
+        # Back-to-back placement needs start times in priority order, so
+        # the slots are assigned once the set of tasks is known
+        placed = [False] * n
+        entries: List[Optional[Dict]] = [None] * n
+        for i in order:
+            t_data = prioritized_tasks[i]
             task = t_data['task']
 
-            if total_minutes + task.estimated_minutes <= available_minutes:
-                # Fits in schedule
-                start_time = current_time + timedelta(minutes=total_minutes)
-                end_time = start_time + \
-                    timedelta(minutes=task.estimated_minutes)
+            if booked is not None:
+                slot = booked.next_free_slot(current_time, task.estimated_minutes)
+                fits = slot is not None
+                if fits:
+                    # Fits in schedule
+                    booked.block(
+                        slot, slot + timedelta(minutes=task.estimated_minutes))
+                    entries[i] = {
+                        'task': task,
+                        'suggested_start': slot,
+                        'suggested_end': slot + timedelta(minutes=task.estimated_minutes),
+                        'priority_score': t_data['priority_score'],
+                        'reason': TaskPrioritizer._get_scheduling_reason(t_data)
+                    }
+            else:
+                fits = total_minutes + task.estimated_minutes <= available_minutes
 
-                schedule.append({
+            if fits:
+                placed[i] = True
+                total_minutes += task.estimated_minutes
+
+        cursor = current_time
+        for i, t_data in enumerate(prioritized_tasks):
+            task = t_data['task']
+            if placed[i] and booked is None:
+                end_time = cursor + timedelta(minutes=task.estimated_minutes)
+                entries[i] = {
                     'task': task,
-                    'suggested_start': start_time,
+                    'suggested_start': cursor,
                     'suggested_end': end_time,
                     'priority_score': t_data['priority_score'],
                     'reason': TaskPrioritizer._get_scheduling_reason(t_data)
-                })
-
-                total_minutes += task.estimated_minutes
-            else:
+                }
+                cursor = end_time
+            elif not placed[i]:
                 # Overflow - doesn't fit today
-                schedule.append({
+                entries[i] = {
                     'task': task,
                     'suggested_start': None,
                     'suggested_end': None,
                     'priority_score': t_data['priority_score'],
                     'reason': 'Overflow - consider tomorrow or delegate'
-                })
+                }
+        schedule = entries
 
-        fits_count = sum(
-            1 for s in schedule if s['suggested_start'] is not None)
+        fits_count = sum(placed)
         overflow_count = len(schedule) - fits_count
 
         return {
@@ -592,6 +1094,11 @@ Keep it concise, practical, and motivating. Use a friendly, coaching tone.
             'total_time_needed': sum(t['task'].estimated_minutes for t in prioritized_tasks),
             'available_time': available_minutes,
             'utilization': min(100, (total_minutes / available_minutes) * 100)
+            if available_minutes > 0 else 100,
+            'scheduled_priority': sum(
+                t['priority_score'] for t, p in zip(prioritized_tasks, placed) if p),
+            'method': method,
+            'exact': method == "knapsack" and granularity == 1,
         }
 
     @staticmethod
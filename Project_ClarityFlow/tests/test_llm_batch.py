@@ -0,0 +1,152 @@
+"""
+ChunkedLLMScorer against a local stand-in for the chat-completions API.
+
+Run from Project_ClarityFlow/:
+    python -m pytest -q tests
+"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.llm_batch import ChunkedLLMScorer, estimate_tokens  # noqa: E402
+from core.llm_client import CircuitBreaker, LLMClient  # noqa: E402
+
+
+class FakeChatHandler(BaseHTTPRequestHandler):
+    """
+    Answers POST /v1/chat/completions with one row per item in the prompt.
+
+    The server's `script` is a list of one-shot behaviours consumed in
+    order ("500", "400" or "length"); once it's empty every request succeeds.
+    """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        items = json.loads(body["messages"][-1]["content"])
+        with self.server.lock:
+            self.server.requests.append(items)
+            action = self.server.script.pop(0) if self.server.script else "ok"
+
+        if action == "500":
+            self._send(500, {"error": {"message": "boom", "type": "server_error"}})
+            return
+        if action == "400":
+            self._send(400, {"error": {"message": "bad", "type": "invalid_request_error"}})
+            return
+
+        rows = [{"index": item["index"], "score": item["value"] * 10} for item in items]
+        self._send(200, {
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(rows)},
+                "finish_reason": "length" if action == "length" else "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeChatHandler)
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    httpd.script = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv(
+        "OPENAI_BASE_URL", f"http://127.0.0.1:{httpd.server_address[1]}/v1")
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_scorer(failure_threshold=100, **kwargs):
+    llm = LLMClient(timeout=5, deadline=20, backoff=0.01,
+                    breaker=CircuitBreaker(failure_threshold=failure_threshold))
+    return ChunkedLLMScorer(
+        build_prompt=json.dumps,
+        system_prompt="Score these items.",
+        llm=llm,
+        **kwargs,
+    )
+
+
+def make_items(n, pad=0):
+    return [{"value": i, "note": "x" * pad} for i in range(n)]
+
+
+def test_chunks_respect_token_budget(server):
+    scorer = make_scorer(max_prompt_tokens=120, max_output_tokens=1000)
+    items = make_items(12, pad=100)
+    sizes = [estimate_tokens(json.dumps(item)) for item in items]
+
+    chunks = scorer.chunks(items)
+    assert len(chunks) > 1
+    assert sorted(p for chunk in chunks for p in chunk) == list(range(12))
+    for chunk in chunks:
+        assert sum(sizes[p] for p in chunk) <= 120
+
+    result = scorer.score(items)
+    assert {p: row["score"] for p, row in result.items()} == {i: i * 10 for i in range(12)}
+    assert sorted(len(r) for r in server.requests) == sorted(len(c) for c in chunks)
+
+
+def test_retries_after_server_error(server):
+    server.script = ["500"]
+    scorer = make_scorer(retries=2)
+
+    result = scorer.score(make_items(3))
+
+    assert {p: row["score"] for p, row in result.items()} == {0: 0, 1: 10, 2: 20}
+    assert len(server.requests) == 2
+    assert server.requests[0] == server.requests[1]
+    assert scorer.llm.stats()["errors"] == 1
+
+
+def test_truncated_reply_is_split_and_resent(server):
+    server.script = ["length"]
+    scorer = make_scorer()
+
+    result = scorer.score(make_items(4))
+
+    assert {p: row["score"] for p, row in result.items()} == {0: 0, 1: 10, 2: 20, 3: 30}
+    assert [len(r) for r in server.requests[:1]] == [4]
+    assert sorted(len(r) for r in server.requests[1:]) == [2, 2]
+    resent = sorted(item["value"] for r in server.requests[1:] for item in r)
+    assert resent == [0, 1, 2, 3]
+
+
+def test_breaker_counts_one_failure_per_chunk(server):
+    server.script = ["500"] * 3 + ["400"]
+    scorer = make_scorer(failure_threshold=2, retries=2)
+
+    assert scorer.score(make_items(3)) == {}  # three attempts, one failure
+    assert scorer.llm.stats()["errors"] == 3
+    assert scorer.llm.breaker.state == "closed"
+
+    assert scorer.score(make_items(3)) == {}  # client error: not an outage
+    assert len(server.requests) == 4
+    assert scorer.llm.breaker.state == "closed"
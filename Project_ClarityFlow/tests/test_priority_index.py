@@ -0,0 +1,53 @@
+"""
+PriorityIndex stays consistent with prioritize_tasks under updates.
+
+Run from Project_ClarityFlow/:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.models import Task  # noqa: E402
+from features.priority_index import PriorityIndex  # noqa: E402
+from features.task_prioritization import TaskPrioritizer  # noqa: E402
+
+NOW = datetime(2026, 1, 5, 9, 0)
+
+
+def make_tasks():
+    return [
+        Task("t0", "deep_work", 120, 5.0, NOW + timedelta(minutes=20)),
+        Task("t1", "coding", 60, 3.5, NOW + timedelta(hours=3)),
+        Task("t2", "coding", 60, 3.5, NOW + timedelta(hours=3)),
+        Task("t3", "admin", 30, 2.0, NOW + timedelta(hours=30)),
+        Task("t4", "communication", 15, 1.0, NOW + timedelta(hours=50)),
+    ]
+
+
+def ids(entries):
+    return [e['task'].task_id for e in entries]
+
+
+def test_replaced_task_with_lower_score_is_reranked():
+    tasks = make_tasks()
+    index = PriorityIndex(tasks, now=NOW)
+    assert ids(index.top(3, now=NOW))[0] == "t0"
+
+    # Same id, much lower priority: old heap entries must not be accepted
+    lower = replace(tasks[0], estimated_minutes=480, complexity_score=1.0,
+                    time_of_day=NOW + timedelta(days=6))
+    index.add(lower)
+
+    full = index.top(None, now=NOW)
+    for k in range(1, len(full) + 1):
+        assert ids(index.top(k, now=NOW)) == ids(full[:k])
+
+    expected = TaskPrioritizer.prioritize_tasks(
+        [lower] + tasks[1:], current_time=NOW)
+    assert ids(full) == ids(expected)
+    assert ids(full)[-1] == "t0"